@@ -1,14 +1,27 @@
 module airdrop_lottery_addr::airdrop_lottery {
+    use std::bcs;
+    use std::cmp;
     use std::error;
+    use std::option::{Self, Option};
     use std::signer;
     use std::string::{Self, String};
     use std::vector;
     use aptos_framework::account;
+    use aptos_framework::aggregator_v2::{Self, Aggregator};
     use aptos_framework::event;
+    use aptos_framework::object::{Self, ExtendRef};
     use aptos_framework::randomness;
     use aptos_framework::timestamp;
+    use aptos_std::big_ordered_map::{Self, BigOrderedMap};
+    use aptos_std::from_bcs;
     use aptos_std::smart_table::{Self, SmartTable};
     use aptos_std::smart_vector::{Self, SmartVector};
+    use aptos_std::table::{Self, Table};
+    use aptos_std::table_with_length::{Self, TableWithLength};
+    use airdrop_lottery_addr::fenwick_tree::{Self, FenwickTree};
+    use airdrop_lottery_addr::merkle_proof;
+    use airdrop_lottery_addr::random_stream;
+    use airdrop_lottery_addr::seeded_permutation;
 
     /// Error codes
     const E_NOT_AUTHORIZED: u64 = 1;
@@ -20,8 +33,48 @@ module airdrop_lottery_addr::airdrop_lottery {
     const E_ALREADY_REGISTERED: u64 = 7;
     const E_INVALID_WINNER_COUNT: u64 = 8;
     const E_INSUFFICIENT_PARTICIPANTS: u64 = 9;
+    const E_DRAW_IN_PROGRESS: u64 = 10;
+    const E_LOTTERY_LIMIT_REACHED: u64 = 11;
+    const E_INVALID_STATUS: u64 = 12;
+    const E_INVALID_PARTICIPANT_MODE: u64 = 13;
+    const E_NOT_A_WINNER: u64 = 14;
+    const E_ALREADY_CLAIMED: u64 = 15;
+    const E_INVALID_PROOF: u64 = 16;
+    const E_INVALID_WEIGHT: u64 = 17;
+    const E_INVALID_BATCH: u64 = 18;
+    const E_ALREADY_ARCHIVED: u64 = 19;
+    const E_INVALID_PACKED_ADDRESSES: u64 = 20;
+    const E_NO_BACKUP_LEFT: u64 = 21;
+    const E_LOTTERY_NOT_DELETED: u64 = 22;
+    const E_SELF_REGISTRATION_DISABLED: u64 = 23;
+
+    /// Status filters for the paginated lottery listings
+    /// Any lottery
+    const STATUS_ANY: u8 = 0;
+    /// Not drawn yet and the deadline has not been reached
+    const STATUS_OPEN: u8 = 1;
+    /// Not drawn yet and the deadline has been reached
+    const STATUS_DRAWABLE: u8 = 2;
+    /// Winners have been drawn
+    const STATUS_COMPLETED: u8 = 3;
+
+    /// Number of low bits of a lottery ID that hold the creator's own sequence number
+    const SEQUENCE_BITS: u8 = 32;
+    /// Upper bound (exclusive) of a creator's sequence number
+    const MAX_SEQUENCE: u64 = 4294967296;
+    const MAX_U64: u64 = 18446744073709551615;
+
+    /// Number of shards that self-registrations are spread over
+    const REGISTRATION_SHARDS: u64 = 32;
+    /// Number of shards of the global lottery index
+    const INDEX_SHARDS: u64 = 16;
+    const ADDRESS_LENGTH: u64 = 32;
+
+    /// Seed of the object that owns every lottery object
+    const LOTTERY_FACTORY_SEED: vector<u8> = b"airdrop_lottery::factory";
 
     /// Structure to manage the state of the airdrop lottery
+    /// Each lottery is stored in its own object, so writes to different lotteries do not conflict
     struct AirdropLottery has key, store {
         /// Unique identifier for the lottery
         lottery_id: u64,
@@ -31,12 +84,43 @@ module airdrop_lottery_addr::airdrop_lottery {
         description: String,
         /// List of participants
         participants: SmartVector<address>,
+        /// Index of each participant's slot in `participants`, used for constant-time lookups
+        participant_index: SmartTable<address, u64>,
+        /// Self-registrations not merged into `participants` yet (shard ID -> shard)
+        registrations: TableWithLength<u64, RegistrationShard>,
+        /// Number of self-registrations not merged into `participants` yet
+        pending_registrations: Aggregator<u64>,
+        /// Whether accounts can register themselves with `register`; off until the creator opts in
+        allow_self_registration: bool,
+        /// Merkle commitment that replaces the stored participant list, if the creator committed one
+        merkle_participants: Option<MerkleParticipants>,
+        /// Weights of the participants, if the lottery is weighted
+        participant_weights: Option<ParticipantWeights>,
+        /// Audit record of the participants once their storage is archived after the draw
+        archive: Option<ParticipantArchive>,
         /// List of winners
         winners: SmartVector<address>,
         /// Number of winners
         winner_count: u64,
+        /// Number of backup winners drawn after the winners, in waitlist order
+        /// The draw lowers it to the number of participants left after the winners, if that is smaller.
+        backup_count: u64,
+        /// Number of backups promoted to replace disqualified winners so far
+        promoted_backups: u64,
         /// Whether the lottery is completed
         is_completed: bool,
+        /// Whether a multi-transaction draw has started and not finished yet
+        is_drawing: bool,
+        /// Number of winners and backups selected so far by the draw
+        draw_cursor: u64,
+        /// Random seed drawn when the draw starts; every winner index is derived from it
+        seed: vector<u8>,
+        /// Next unused block of the index stream derived from `seed`
+        seed_counter: u64,
+        /// Whether the winners are derived from `seed` on demand instead of being stored
+        lazy_winners: bool,
+        /// Whether the lottery was deleted and only waits for its storage to be purged
+        is_deleted: bool,
         /// Creator of the lottery
         creator: address,
         /// Creation time of the lottery
@@ -45,20 +129,125 @@ module airdrop_lottery_addr::airdrop_lottery {
         deadline: u64,
     }
 
+    /// Self-registrations of one shard
+    /// Registrations are spread over shards by address and counted with an aggregator, so concurrent
+    /// registrations to the same lottery rarely write the same storage slot
+    struct RegistrationShard has store {
+        /// Registered addresses
+        members: SmartVector<address>,
+        /// Index of each registered address's slot in `members`
+        index: SmartTable<address, u64>,
+    }
+
+    /// Participants committed as a Merkle root instead of being stored one by one
+    /// The draw selects winning leaf indices, and winners prove membership with a Merkle proof when
+    /// they claim (see `merkle_proof` for the tree layout), so storage does not grow with the participants.
+    struct MerkleParticipants has store {
+        /// Merkle root of the participant addresses
+        root: vector<u8>,
+        /// Number of leaves of the tree
+        leaf_count: u64,
+        /// Leaf indices moved by the partial shuffle (position -> leaf index); other positions hold their own index
+        leaf_swaps: SmartTable<u64, u64>,
+        /// Winning leaf indices in draw order
+        winning_leaves: SmartVector<u64>,
+        /// Claimant of each winning leaf (@0x0 until claimed)
+        claims: SmartTable<u64, address>,
+        /// Winning leaf claimed by each claimant
+        claimants: SmartTable<address, u64>,
+    }
+
+    /// Weights of the participants of a weighted lottery
+    /// A participant with weight w is drawn with probability proportional to w, without expanding
+    /// the weight into individual entries: a random offset below the total weight is mapped to its
+    /// participant with a Fenwick tree search in O(log N).
+    struct ParticipantWeights has store {
+        /// Weight of each participant, in the order of `participants`
+        weights: SmartVector<u64>,
+        /// Weights of the participants that have not been drawn yet, in the order of `participants`
+        tree: FenwickTree,
+    }
+
+    /// Merkle commitment that replaces the participants of an archived lottery
+    /// Leaf i is the participant at position participant_count - 1 - i of the list at the time of
+    /// archiving, with the tree layout of `merkle_proof`.
+    struct ParticipantArchive has store {
+        /// Number of participants when archiving started
+        participant_count: u64,
+        /// Number of participants added to the tree so far
+        archived_count: u64,
+        /// Subtree roots of the tree being built (see `merkle_proof::append_leaf`)
+        frontier: vector<vector<u8>>,
+        /// Merkle root of the participants, set once every participant has been added
+        root: vector<u8>,
+    }
+
     /// Structure to manage the state of the module
+    /// Lottery IDs are allocated per creator as `(creator_index << 32) | sequence`, so allocating an ID
+    /// only writes the creator's own resources. The module data is only written when an account creates
+    /// its first lottery.
     struct ModuleData has key {
-        /// Next lottery ID
-        next_lottery_id: u64,
-        /// List of created lotteries
-        lotteries: vector<u64>,
-        /// Table to store all lotteries by ID
-        lotteries_table: SmartTable<u64, AirdropLottery>,
+        /// Accounts that have created lotteries, in registration order (position = creator index)
+        creators: SmartVector<address>,
+        /// Extend ref of the factory object under which lottery objects are created
+        extend_ref: ExtendRef,
+    }
+
+    /// Key of a pending lottery index, ordered by deadline and then by lottery ID
+    struct DeadlineKey has copy, drop, store {
+        deadline: u64,
+        lottery_id: u64,
+    }
+
+    /// Global index of the lotteries of all creators, split into `INDEX_SHARDS` shards by lottery ID
+    /// Each shard is a separate table entry, so lotteries in different shards never write the same storage
+    /// slot, and views merge the shards instead of visiting every creator. The shards are created with the
+    /// module, so adding or removing a lottery never writes the tables themselves.
+    struct LotteryIndex has key {
+        /// Creator of each lottery that has not been drawn yet, keyed by deadline and lottery ID (shard ID -> shard)
+        pending: Table<u64, BigOrderedMap<DeadlineKey, address>>,
+        /// Creator of each lottery whose winners have been drawn, keyed by lottery ID (shard ID -> shard)
+        completed: Table<u64, BigOrderedMap<u64, address>>,
+    }
+
+    /// Next key of each index shard being merged, kept as a binary heap so the merge takes the next
+    /// key in O(log INDEX_SHARDS)
+    struct ShardHeads<K: copy + drop> has drop {
+        /// Next key of each shard that is not exhausted, in heap order
+        keys: vector<K>,
+        /// Shard of each key
+        shards: vector<u64>,
+        /// Whether the shards are merged in descending key order
+        descending: bool,
     }
 
     /// Structure to manage the list of lotteries created by an account
     struct AccountLotteries has key {
-        /// List of lotteries created by the account
-        created_lotteries: vector<u64>,
+        /// Position of the account in the module's creator list, used as the high bits of its lottery IDs
+        creator_index: u64,
+        /// Sequence number of the next lottery created by the account, used as the low bits of its lottery ID
+        next_sequence: u64,
+        /// Lotteries created by the account and not deleted (lottery ID -> creation time)
+        created_lotteries: BigOrderedMap<u64, u64>,
+        /// Lotteries of the account whose winners have not been drawn yet, ordered by deadline (key -> creation time)
+        pending_lotteries: BigOrderedMap<DeadlineKey, u64>,
+        /// Lotteries of the account whose winners have been drawn (lottery ID -> completion time)
+        completed_lotteries: BigOrderedMap<u64, u64>,
+    }
+
+    /// Details of a lottery returned by `get_lottery_details_batch`
+    /// `name` and `description` are empty when the caller leaves out the text fields. Other modules read
+    /// the fields with the `summary_*` accessors.
+    struct LotterySummary has copy, drop, store {
+        lottery_id: u64,
+        name: String,
+        description: String,
+        winner_count: u64,
+        participant_count: u64,
+        is_completed: bool,
+        creator: address,
+        created_at: u64,
+        deadline: u64,
     }
 
     #[event]
@@ -67,30 +256,108 @@ module airdrop_lottery_addr::airdrop_lottery {
         name: String,
         creator: address,
         winner_count: u64,
+        backup_count: u64,
+        deadline: u64,
+    }
+
+    #[event]
+    struct LotteryBatchCreationEvent has drop, store {
+        creator: address,
+        /// The batch created lotteries first_lottery_id, first_lottery_id + 1, ..., in argument order
+        first_lottery_id: u64,
+        lottery_count: u64,
+    }
+
+    #[event]
+    struct LotteryDeletionEvent has drop, store {
+        lottery_id: u64,
+        creator: address,
+    }
+
+    #[event]
+    struct DeadlineUpdateEvent has drop, store {
+        lottery_id: u64,
         deadline: u64,
     }
 
+    #[event]
+    struct SelfRegistrationUpdateEvent has drop, store {
+        lottery_id: u64,
+        allowed: bool,
+    }
+
     #[event]
     struct LotteryCompletionEvent has drop, store {
         lottery_id: u64,
         winners: vector<address>,
     }
 
+    #[event]
+    struct BackupPromotionEvent has drop, store {
+        lottery_id: u64,
+        disqualified: address,
+        promoted: address,
+    }
+
+    #[event]
+    struct LotteryBatchDrawEvent has drop, store {
+        creator: address,
+        drawn: vector<u64>,
+        skipped: vector<u64>,
+    }
+
+    #[event]
+    struct LotteryArchiveEvent has drop, store {
+        lottery_id: u64,
+        participant_count: u64,
+        participants_root: vector<u8>,
+    }
+
+    #[event]
+    struct WinningLeavesEvent has drop, store {
+        lottery_id: u64,
+        leaf_indices: vector<u64>,
+    }
+
+    #[event]
+    struct WinClaimEvent has drop, store {
+        lottery_id: u64,
+        winner: address,
+        leaf_index: u64,
+    }
+
     /// Initialize the module
     fun init_module(account: &signer) {
         let account_addr = signer::address_of(account);
         
-        // Initialize ModuleData
+        // Create the factory object that owns the lottery objects
+        let factory_constructor_ref = object::create_named_object(account, LOTTERY_FACTORY_SEED);
+        
+        // Initialize ModuleData, registering the module account as the first creator
         move_to(account, ModuleData {
-            next_lottery_id: 1,
-            lotteries: vector::empty<u64>(),
-            lotteries_table: smart_table::new(),
+            creators: smart_vector::singleton(account_addr),
+            extend_ref: object::generate_extend_ref(&factory_constructor_ref),
         });
         
         // Initialize AccountLotteries
         move_to(account, AccountLotteries {
-            created_lotteries: vector::empty<u64>(),
+            creator_index: 0,
+            next_sequence: 1,
+            created_lotteries: big_ordered_map::new<u64, u64>(),
+            pending_lotteries: big_ordered_map::new<DeadlineKey, u64>(),
+            completed_lotteries: big_ordered_map::new<u64, u64>(),
         });
+        
+        // Initialize the global lottery index with all of its shards
+        let pending = table::new<u64, BigOrderedMap<DeadlineKey, address>>();
+        let completed = table::new<u64, BigOrderedMap<u64, address>>();
+        let shard_id = 0;
+        while (shard_id < INDEX_SHARDS) {
+            table::add(&mut pending, shard_id, big_ordered_map::new<DeadlineKey, address>());
+            table::add(&mut completed, shard_id, big_ordered_map::new<u64, address>());
+            shard_id = shard_id + 1;
+        };
+        move_to(account, LotteryIndex { pending, completed });
     }
 
     public(friend) fun init_module_for_test(account: &signer) {
@@ -104,109 +371,348 @@ module airdrop_lottery_addr::airdrop_lottery {
         description: String,
         winner_count: u64,
         deadline: u64
-    ) acquires ModuleData, AccountLotteries {
+    ) acquires ModuleData, AccountLotteries, LotteryIndex {
+        create_lottery_with_backups(account, name, description, winner_count, 0, deadline);
+    }
+
+    /// Create a new lottery that also draws `backup_count` backup winners
+    /// The draw continues the same shuffle for `backup_count` more positions after the winners, which
+    /// form an ordered waitlist; `promote_backup` replaces a disqualified winner with the next backup
+    /// without another draw. Only `winner_count` participants are required: with fewer than
+    /// `winner_count + backup_count`, every participant left after the winners becomes a backup.
+    /// Backups are not supported for Merkle-committed or lazily drawn lotteries.
+    public entry fun create_lottery_with_backups(
+        account: &signer,
+        name: String,
+        description: String,
+        winner_count: u64,
+        backup_count: u64,
+        deadline: u64
+    ) acquires ModuleData, AccountLotteries, LotteryIndex {
         let account_addr = signer::address_of(account);
-        let module_data = borrow_global_mut<ModuleData>(@airdrop_lottery_addr);
         
-        // Get and update the lottery ID
-        let lottery_id = module_data.next_lottery_id;
-        module_data.next_lottery_id = lottery_id + 1;
+        // Register the account as a creator on its first lottery
+        register_creator(account);
         
-        // Create the lottery
-        let lottery = AirdropLottery {
-            lottery_id,
-            name,
-            description,
-            participants: smart_vector::new<address>(),
-            winners: smart_vector::new<address>(),
-            winner_count,
-            is_completed: false,
-            creator: account_addr,
-            created_at: timestamp::now_seconds(),
-            deadline,
-        };
+        // Allocate the lottery ID from the account's own sequence and update its lottery list
+        let account_lotteries = borrow_global_mut<AccountLotteries>(account_addr);
+        let sequence = account_lotteries.next_sequence;
+        assert!(sequence < MAX_SEQUENCE, error::out_of_range(E_LOTTERY_LIMIT_REACHED));
+        let lottery_id = (account_lotteries.creator_index << SEQUENCE_BITS) | sequence;
+        account_lotteries.next_sequence = sequence + 1;
+        big_ordered_map::add(&mut account_lotteries.created_lotteries, lottery_id, timestamp::now_seconds());
+        big_ordered_map::add(&mut account_lotteries.pending_lotteries, DeadlineKey { deadline, lottery_id }, timestamp::now_seconds());
+        index_pending(lottery_id, deadline, account_addr);
+        
+        // Save the lottery in its own object, addressed by the lottery ID
+        let module_data = borrow_global<ModuleData>(@airdrop_lottery_addr);
+        let factory_signer = object::generate_signer_for_extending(&module_data.extend_ref);
+        store_lottery(&factory_signer, new_lottery(lottery_id, copy name, description, winner_count, backup_count, deadline, account_addr));
+        
+        // Emit event
+        event::emit(
+            LotteryCreationEvent {
+                lottery_id,
+                name,
+                creator: account_addr,
+                winner_count,
+                backup_count,
+                deadline,
+            },
+        );
+    }
+
+    /// Create several lotteries in one transaction
+    /// The lotteries get consecutive IDs from the creator's sequence, in the order of the arguments,
+    /// and a single `LotteryBatchCreationEvent` reports the ID range instead of one event per lottery.
+    public entry fun create_lotteries_batch(
+        account: &signer,
+        names: vector<String>,
+        descriptions: vector<String>,
+        winner_counts: vector<u64>,
+        deadlines: vector<u64>
+    ) acquires ModuleData, AccountLotteries, LotteryIndex {
+        let account_addr = signer::address_of(account);
+        let lottery_count = vector::length(&names);
+        assert!(
+            lottery_count > 0
+                && vector::length(&descriptions) == lottery_count
+                && vector::length(&winner_counts) == lottery_count
+                && vector::length(&deadlines) == lottery_count,
+            error::invalid_argument(E_INVALID_BATCH)
+        );
         
-        // Save the lottery to global storage
-        smart_table::add(&mut module_data.lotteries_table, lottery_id, lottery);
+        // Register the account as a creator on its first lottery
+        register_creator(account);
         
-        // Update module data
-        vector::push_back(&mut module_data.lotteries, lottery_id);
+        // Allocate a contiguous range of lottery IDs
+        let account_lotteries = borrow_global_mut<AccountLotteries>(account_addr);
+        let first_sequence = account_lotteries.next_sequence;
+        assert!(lottery_count <= MAX_SEQUENCE - first_sequence, error::out_of_range(E_LOTTERY_LIMIT_REACHED));
+        let first_lottery_id = (account_lotteries.creator_index << SEQUENCE_BITS) | first_sequence;
+        account_lotteries.next_sequence = first_sequence + lottery_count;
         
-        // Update the account's lottery list
-        if (!exists<AccountLotteries>(account_addr)) {
-            move_to(account, AccountLotteries {
-                created_lotteries: vector::empty<u64>(),
-            });
+        let module_data = borrow_global<ModuleData>(@airdrop_lottery_addr);
+        let factory_signer = object::generate_signer_for_extending(&module_data.extend_ref);
+        
+        vector::reverse(&mut names);
+        vector::reverse(&mut descriptions);
+        let i = 0;
+        while (i < lottery_count) {
+            let lottery_id = first_lottery_id + i;
+            let deadline = *vector::borrow(&deadlines, i);
+            big_ordered_map::add(&mut account_lotteries.created_lotteries, lottery_id, timestamp::now_seconds());
+            big_ordered_map::add(&mut account_lotteries.pending_lotteries, DeadlineKey { deadline, lottery_id }, timestamp::now_seconds());
+            index_pending(lottery_id, deadline, account_addr);
+            store_lottery(&factory_signer, new_lottery(
+                lottery_id,
+                vector::pop_back(&mut names),
+                vector::pop_back(&mut descriptions),
+                *vector::borrow(&winner_counts, i),
+                0,
+                deadline,
+                account_addr
+            ));
+            i = i + 1;
         };
         
+        // Emit event
+        event::emit(
+            LotteryBatchCreationEvent {
+                creator: account_addr,
+                first_lottery_id,
+                lottery_count,
+            },
+        );
+    }
+
+    /// Delete a lottery and remove it from every index (creator only)
+    /// Lotteries can be deleted at any time except during a chunked draw. Deletion only detaches the lottery,
+    /// so its cost does not depend on the number of participants; its storage is then freed in batches
+    /// with `purge_lottery`, which refunds the deposit to the creator. Its ID is never reused.
+    public entry fun delete_lottery(
+        account: &signer,
+        lottery_id: u64
+    ) acquires AccountLotteries, AirdropLottery, LotteryIndex {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not being drawn in chunks
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        // Remove the lottery from the indexes
         let account_lotteries = borrow_global_mut<AccountLotteries>(account_addr);
-        vector::push_back(&mut account_lotteries.created_lotteries, lottery_id);
+        big_ordered_map::remove(&mut account_lotteries.created_lotteries, &lottery_id);
+        if (lottery.is_completed) {
+            big_ordered_map::remove(&mut account_lotteries.completed_lotteries, &lottery_id);
+            unindex_completed(lottery_id);
+        } else {
+            big_ordered_map::remove(&mut account_lotteries.pending_lotteries, &DeadlineKey { deadline: lottery.deadline, lottery_id });
+            unindex_pending(lottery_id, lottery.deadline);
+        };
+        
+        // Mark the lottery deleted; purging replays the draw's index stream from the start to find
+        // the positions recorded in `leaf_swaps`, so the draw state is reset for it
+        lottery.is_deleted = true;
+        lottery.draw_cursor = 0;
+        lottery.seed_counter = 0;
         
         // Emit event
         event::emit(
-            LotteryCreationEvent {
+            LotteryDeletionEvent {
                 lottery_id,
-                name: *&name,
                 creator: account_addr,
-                winner_count,
+            },
+        );
+    }
+
+    /// Free the storage of a deleted lottery, at most `max_count` entries per call (creator only)
+    /// Participants, registrations, weights and winners are deleted from the back of their lists, refunding
+    /// their storage deposit to the caller. The call that deletes the last entry also removes the lottery itself.
+    public entry fun purge_lottery(
+        account: &signer,
+        lottery_id: u64,
+        max_count: u64
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists; deleted lotteries are hidden from `borrow_lottery_mut`
+        let lottery_addr = lottery_address(lottery_id);
+        assert!(exists<AirdropLottery>(lottery_addr), error::not_found(E_LOTTERY_NOT_FOUND));
+        let lottery = borrow_global_mut<AirdropLottery>(lottery_addr);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is deleted
+        assert!(lottery.is_deleted, error::invalid_state(E_LOTTERY_NOT_DELETED));
+        
+        if (purge_entries(lottery, max_count)) {
+            destroy_lottery(move_from<AirdropLottery>(lottery_addr));
+        };
+    }
+
+    /// Change the deadline of a lottery that has not been drawn (creator only)
+    public entry fun update_deadline(
+        account: &signer,
+        lottery_id: u64,
+        deadline: u64
+    ) acquires AccountLotteries, AirdropLottery, LotteryIndex {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed or being drawn
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        // Move the lottery to its new position in the indexes
+        let account_lotteries = borrow_global_mut<AccountLotteries>(account_addr);
+        let created_at = big_ordered_map::remove(
+            &mut account_lotteries.pending_lotteries,
+            &DeadlineKey { deadline: lottery.deadline, lottery_id }
+        );
+        big_ordered_map::add(&mut account_lotteries.pending_lotteries, DeadlineKey { deadline, lottery_id }, created_at);
+        unindex_pending(lottery_id, lottery.deadline);
+        index_pending(lottery_id, deadline, account_addr);
+        lottery.deadline = deadline;
+        
+        // Emit event
+        event::emit(
+            DeadlineUpdateEvent {
+                lottery_id,
                 deadline,
             },
         );
     }
 
+    /// Allow or forbid self-registration with `register` for a lottery that has not been drawn (creator only)
+    /// Lotteries are created closed, so only the creator adds participants until it is allowed.
+    /// Forbidding it again keeps the registrations already made.
+    public entry fun set_self_registration(
+        account: &signer,
+        lottery_id: u64,
+        allowed: bool
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed or being drawn
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        // Participants of a Merkle-committed lottery are not stored
+        assert!(option::is_none(&lottery.merkle_participants), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        
+        lottery.allow_self_registration = allowed;
+        
+        // Emit event
+        event::emit(
+            SelfRegistrationUpdateEvent {
+                lottery_id,
+                allowed,
+            },
+        );
+    }
+
     /// Add participant(s) (creator only)
     public entry fun add_participant(
         account: &signer,
         lottery_id: u64,
         participants: vector<address>
-    ) acquires ModuleData {
+    ) acquires AirdropLottery {
         let account_addr = signer::address_of(account);
         
-        // Get module data and check if lottery exists
-        let module_data = borrow_global_mut<ModuleData>(@airdrop_lottery_addr);
-        assert!(smart_table::contains(&module_data.lotteries_table, lottery_id), error::not_found(E_LOTTERY_NOT_FOUND));
-        
-        let lottery = smart_table::borrow_mut(&mut module_data.lotteries_table, lottery_id);
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
         
         // Only the creator can execute
         assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
         
-        // Check if the lottery is not completed
+        // Check if the lottery is not completed or being drawn
         assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        // Participants of a Merkle-committed lottery are not stored
+        assert!(option::is_none(&lottery.merkle_participants), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
         
         // Add participants
+        let check_pending = has_pending_registrations(lottery);
         let i = 0;
         let participants_count = vector::length(&participants);
         while (i < participants_count) {
-            let participant = *vector::borrow(&participants, i);
-            // Check if not already registered
-            let (is_registered, _) = smart_vector::index_of(&lottery.participants, &participant);
-            if (!is_registered) {
-                smart_vector::push_back(&mut lottery.participants, participant);
-            };
+            insert_participant(lottery, *vector::borrow(&participants, i), 1, check_pending);
             i = i + 1;
         };
     }
 
+    /// Add participants packed as concatenated 32-byte addresses (creator only)
+    /// Same as `add_participant`, but the argument is a single byte vector, which avoids decoding
+    /// every address as a separate argument element and fits more addresses per transaction.
+    public entry fun add_participants_packed(
+        account: &signer,
+        lottery_id: u64,
+        packed_participants: vector<u8>
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed or being drawn
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        // Participants of a Merkle-committed lottery are not stored
+        assert!(option::is_none(&lottery.merkle_participants), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        
+        let length = vector::length(&packed_participants);
+        assert!(length % ADDRESS_LENGTH == 0, error::invalid_argument(E_INVALID_PACKED_ADDRESSES));
+        
+        // Add participants
+        let check_pending = has_pending_registrations(lottery);
+        let start = 0;
+        while (start < length) {
+            let participant = from_bcs::to_address(vector::slice(&packed_participants, start, start + ADDRESS_LENGTH));
+            insert_participant(lottery, participant, 1, check_pending);
+            start = start + ADDRESS_LENGTH;
+        };
+    }
+
     /// Remove participant(s) (creator only)
     public entry fun remove_participant(
         account: &signer,
         lottery_id: u64,
         participants: vector<address>
-    ) acquires ModuleData {
+    ) acquires AirdropLottery {
         let account_addr = signer::address_of(account);
         
-        // Get module data and check if lottery exists
-        let module_data = borrow_global_mut<ModuleData>(@airdrop_lottery_addr);
-        assert!(smart_table::contains(&module_data.lotteries_table, lottery_id), error::not_found(E_LOTTERY_NOT_FOUND));
-        
-        let lottery = smart_table::borrow_mut(&mut module_data.lotteries_table, lottery_id);
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
         
         // Only the creator can execute
         assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
         
-        // Check if the lottery is not completed
+        // Check if the lottery is not completed or being drawn
         assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
         
         // Remove participants
         let i = 0;
@@ -214,242 +720,2858 @@ module airdrop_lottery_addr::airdrop_lottery {
         while (i < participants_count) {
             let participant = *vector::borrow(&participants, i);
             // Check if the participant exists
-            let (is_registered, index) = smart_vector::index_of(&lottery.participants, &participant);
-            if (is_registered) {
-                smart_vector::remove(&mut lottery.participants, index);
+            if (smart_table::contains(&lottery.participant_index, participant)) {
+                let index = smart_table::remove(&mut lottery.participant_index, participant);
+                // Move the last participant into the freed slot (the draw does not depend on order)
+                smart_vector::swap_remove(&mut lottery.participants, index);
+                swap_remove_weight(&mut lottery.participant_weights, index);
+                if (index < smart_vector::length(&lottery.participants)) {
+                    let moved = *smart_vector::borrow(&lottery.participants, index);
+                    *smart_table::borrow_mut(&mut lottery.participant_index, moved) = index;
+                };
+            } else {
+                remove_registration(lottery, participant);
             };
             i = i + 1;
         };
     }
 
+    /// Register the caller as a participant of a lottery before its deadline
+    /// Only lotteries whose creator allowed self-registration with `set_self_registration` accept it.
+    public entry fun register(
+        account: &signer,
+        lottery_id: u64
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Check if the creator allowed self-registration
+        assert!(lottery.allow_self_registration, error::permission_denied(E_SELF_REGISTRATION_DISABLED));
+        
+        // Check if the lottery is still accepting participants
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        assert!(timestamp::now_seconds() < lottery.deadline, error::invalid_state(E_DEADLINE_PASSED));
+        
+        // Participants of a Merkle-committed lottery are not stored
+        assert!(option::is_none(&lottery.merkle_participants), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        
+        // Check if not already registered
+        assert!(!is_registered(lottery, account_addr), error::already_exists(E_ALREADY_REGISTERED));
+        
+        add_registration(lottery, account_addr);
+    }
+
+    /// Merge at most `max_count` pending self-registrations into the participant list (creator only)
+    /// The draw merges any remaining registrations itself; this lets creators of very large lotteries
+    /// spread the merge over several transactions.
+    public entry fun merge_registrations(
+        account: &signer,
+        lottery_id: u64,
+        max_count: u64
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed or being drawn
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        merge_pending_registrations(lottery, max_count);
+    }
+
+    /// Add participant(s) with weights (creator only)
+    /// The first call makes the lottery weighted and is only allowed while no participants are stored.
+    /// Participants added in any other way to a weighted lottery get weight 1.
+    public entry fun add_weighted_participants(
+        account: &signer,
+        lottery_id: u64,
+        participants: vector<address>,
+        weights: vector<u64>
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed or being drawn
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        // Participants of a Merkle-committed lottery are not stored
+        assert!(option::is_none(&lottery.merkle_participants), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        
+        let participants_count = vector::length(&participants);
+        assert!(vector::length(&weights) == participants_count, error::invalid_argument(E_INVALID_WEIGHT));
+        
+        make_weighted(lottery);
+        
+        // Add participants
+        let check_pending = has_pending_registrations(lottery);
+        let i = 0;
+        while (i < participants_count) {
+            let participant = *vector::borrow(&participants, i);
+            let weight = *vector::borrow(&weights, i);
+            assert!(weight > 0, error::invalid_argument(E_INVALID_WEIGHT));
+            insert_participant(lottery, participant, weight, check_pending);
+            i = i + 1;
+        };
+    }
+
+    /// Give participants more tickets (creator only)
+    /// Tickets are weights: a participant is stored once with its ticket count, however many tickets
+    /// it earns. Tickets of stored participants are added to their count, pending self-registrations
+    /// are stored with 1 + `tickets`, and other addresses are added with `tickets`. The first call makes
+    /// the lottery weighted, like `add_weighted_participants`.
+    public entry fun add_tickets(
+        account: &signer,
+        lottery_id: u64,
+        participants: vector<address>,
+        tickets: vector<u64>
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed or being drawn
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        // Participants of a Merkle-committed lottery are not stored
+        assert!(option::is_none(&lottery.merkle_participants), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        
+        let participants_count = vector::length(&participants);
+        assert!(vector::length(&tickets) == participants_count, error::invalid_argument(E_INVALID_WEIGHT));
+        
+        make_weighted(lottery);
+        
+        let i = 0;
+        while (i < participants_count) {
+            let participant = *vector::borrow(&participants, i);
+            let count = *vector::borrow(&tickets, i);
+            assert!(count > 0, error::invalid_argument(E_INVALID_WEIGHT));
+            if (smart_table::contains(&lottery.participant_index, participant)) {
+                // Extend the participant's ticket range
+                let slot = *smart_table::borrow(&lottery.participant_index, participant);
+                let weights = option::borrow_mut(&mut lottery.participant_weights);
+                let weight = smart_vector::borrow_mut(&mut weights.weights, slot);
+                *weight = *weight + count;
+                fenwick_tree::increase(&mut weights.tree, slot, count);
+            } else {
+                // Store the participant, keeping the ticket of a pending self-registration
+                if (remove_registration(lottery, participant)) {
+                    count = count + 1;
+                };
+                let slot = smart_vector::length(&lottery.participants);
+                smart_table::add(&mut lottery.participant_index, participant, slot);
+                smart_vector::push_back(&mut lottery.participants, participant);
+                push_weight(&mut lottery.participant_weights, count);
+            };
+            i = i + 1;
+        };
+    }
+
+    /// Commit the participants as a Merkle root instead of storing them (creator only)
+    /// Only allowed while no participants are stored. Committing again before the draw replaces the root.
+    public entry fun commit_participants_root(
+        account: &signer,
+        lottery_id: u64,
+        root: vector<u8>,
+        leaf_count: u64
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed or being drawn
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        // The commitment replaces the stored participant list
+        assert!(
+            smart_vector::is_empty(&lottery.participants) && aggregator_v2::read(&lottery.pending_registrations) == 0,
+            error::invalid_state(E_INVALID_PARTICIPANT_MODE)
+        );
+        assert!(option::is_none(&lottery.participant_weights), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        assert!(lottery.backup_count == 0, error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        assert!(vector::length(&root) == 32, error::invalid_argument(E_INVALID_PROOF));
+        
+        if (option::is_some(&lottery.merkle_participants)) {
+            let commitment = option::borrow_mut(&mut lottery.merkle_participants);
+            commitment.root = root;
+            commitment.leaf_count = leaf_count;
+        } else {
+            option::fill(&mut lottery.merkle_participants, MerkleParticipants {
+                root,
+                leaf_count,
+                leaf_swaps: smart_table::new<u64, u64>(),
+                winning_leaves: smart_vector::new<u64>(),
+                claims: smart_table::new<u64, address>(),
+                claimants: smart_table::new<address, u64>(),
+            });
+        };
+    }
+
+    /// Archive the participants of a completed lottery, at most `max_count` per call (creator only)
+    /// Each participant is added to a Merkle tree, and participants who did not win are deleted from
+    /// storage as they are added, refunding their storage deposit to the caller. The winners and backups
+    /// stay at the front of the list, so the winner views keep working. Once every participant has been added,
+    /// only the root and the participant count remain as the audit record (see `get_participants_root`).
+    public entry fun archive_lottery(
+        account: &signer,
+        lottery_id: u64,
+        max_count: u64
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is completed
+        assert!(lottery.is_completed, error::invalid_state(E_LOTTERY_NOT_COMPLETED));
+        
+        // Merkle-committed lotteries store no participants, and lazily drawn winners are derived from the list
+        assert!(
+            option::is_none(&lottery.merkle_participants) && !lottery.lazy_winners,
+            error::invalid_state(E_INVALID_PARTICIPANT_MODE)
+        );
+        
+        if (option::is_none(&lottery.archive)) {
+            option::fill(&mut lottery.archive, ParticipantArchive {
+                participant_count: smart_vector::length(&lottery.participants),
+                archived_count: 0,
+                frontier: vector::empty<vector<u8>>(),
+                root: vector::empty<u8>(),
+            });
+        } else {
+            let archive = option::borrow(&lottery.archive);
+            assert!(archive.archived_count < archive.participant_count, error::invalid_state(E_ALREADY_ARCHIVED));
+        };
+        
+        // Add participants from the back of the list, deleting those who did not win
+        let archive = option::borrow_mut(&mut lottery.archive);
+        let remaining = archive.participant_count - archive.archived_count;
+        let batch = if (max_count < remaining) { max_count } else { remaining };
+        let end = archive.archived_count + batch;
+        while (archive.archived_count < end) {
+            let position = archive.participant_count - 1 - archive.archived_count;
+            let participant = *smart_vector::borrow(&lottery.participants, position);
+            merkle_proof::append_leaf(&mut archive.frontier, merkle_proof::leaf_hash(participant));
+            if (position >= lottery.draw_cursor) {
+                smart_vector::pop_back(&mut lottery.participants);
+                smart_table::remove(&mut lottery.participant_index, participant);
+                swap_remove_weight(&mut lottery.participant_weights, position);
+            };
+            archive.archived_count = archive.archived_count + 1;
+        };
+        
+        if (archive.archived_count == archive.participant_count) {
+            archive.root = merkle_proof::frontier_root(&archive.frontier, archive.participant_count);
+            archive.frontier = vector::empty<vector<u8>>();
+            
+            // Emit event
+            event::emit(
+                LotteryArchiveEvent {
+                    lottery_id,
+                    participant_count: archive.participant_count,
+                    participants_root: *&archive.root,
+                },
+            );
+        };
+    }
+
+    /// Claim a win of a Merkle-committed lottery by proving that the caller is the winning leaf
+    public entry fun claim_win(
+        account: &signer,
+        lottery_id: u64,
+        leaf_index: u64,
+        proof: vector<vector<u8>>
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Check if the lottery is completed and Merkle-committed
+        assert!(lottery.is_completed, error::invalid_state(E_LOTTERY_NOT_COMPLETED));
+        assert!(option::is_some(&lottery.merkle_participants), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        
+        // Check if the leaf won and has not been claimed
+        let commitment = option::borrow_mut(&mut lottery.merkle_participants);
+        assert!(smart_table::contains(&commitment.claims, leaf_index), error::invalid_argument(E_NOT_A_WINNER));
+        assert!(*smart_table::borrow(&commitment.claims, leaf_index) == @0x0, error::already_exists(E_ALREADY_CLAIMED));
+        
+        // Check the membership proof of the caller's address
+        let leaf = merkle_proof::leaf_hash(account_addr);
+        assert!(
+            merkle_proof::verify(&commitment.root, commitment.leaf_count, leaf_index, leaf, &proof),
+            error::invalid_argument(E_INVALID_PROOF)
+        );
+        
+        *smart_table::borrow_mut(&mut commitment.claims, leaf_index) = account_addr;
+        smart_table::upsert(&mut commitment.claimants, account_addr, leaf_index);
+        smart_vector::push_back(&mut lottery.winners, account_addr);
+        
+        // Emit event
+        event::emit(
+            WinClaimEvent {
+                lottery_id,
+                winner: account_addr,
+                leaf_index,
+            },
+        );
+    }
+
+    /// Append a participant to the list unless it is already registered, either by the creator or by the participant
+    /// Batches check `has_pending_registrations` once and pass it as `check_pending`: without pending
+    /// self-registrations, the participant index alone catches duplicates, including those within the batch,
+    /// and the per-address shard lookup is skipped.
+    fun insert_participant(lottery: &mut AirdropLottery, participant: address, weight: u64, check_pending: bool) {
+        let registered = if (check_pending) {
+            is_registered(lottery, participant)
+        } else {
+            smart_table::contains(&lottery.participant_index, participant)
+        };
+        if (!registered) {
+            let slot = smart_vector::length(&lottery.participants);
+            smart_table::add(&mut lottery.participant_index, participant, slot);
+            smart_vector::push_back(&mut lottery.participants, participant);
+            push_weight(&mut lottery.participant_weights, weight);
+        };
+    }
+
+    /// Check if any self-registration shard exists
+    /// Merging and removal both delete emptied shards, so a shard exists only while it holds a registration.
+    /// This reads the shard count instead of the pending aggregator, which avoids reading the aggregator's
+    /// value; it still conflicts with a concurrent registration that creates a shard, as that writes the count.
+    fun has_pending_registrations(lottery: &AirdropLottery): bool {
+        table_with_length::length(&lottery.registrations) > 0
+    }
+
+    /// Check if an address is a participant, either merged or pending
+    fun is_registered(lottery: &AirdropLottery, participant: address): bool {
+        if (smart_table::contains(&lottery.participant_index, participant)) {
+            return true
+        };
+        let shard_id = registration_shard(participant);
+        table_with_length::contains(&lottery.registrations, shard_id)
+            && smart_table::contains(&table_with_length::borrow(&lottery.registrations, shard_id).index, participant)
+    }
+
+    /// Get the registration shard of an address
+    fun registration_shard(participant: address): u64 {
+        let bytes = bcs::to_bytes(&participant);
+        (*vector::borrow(&bytes, vector::length(&bytes) - 1) as u64) % REGISTRATION_SHARDS
+    }
+
+    /// Add a pending self-registration to its shard
+    fun add_registration(lottery: &mut AirdropLottery, participant: address) {
+        let shard_id = registration_shard(participant);
+        if (!table_with_length::contains(&lottery.registrations, shard_id)) {
+            table_with_length::add(&mut lottery.registrations, shard_id, RegistrationShard {
+                members: smart_vector::new<address>(),
+                index: smart_table::new<address, u64>(),
+            });
+        };
+        
+        let shard = table_with_length::borrow_mut(&mut lottery.registrations, shard_id);
+        smart_table::add(&mut shard.index, participant, smart_vector::length(&shard.members));
+        smart_vector::push_back(&mut shard.members, participant);
+        aggregator_v2::add(&mut lottery.pending_registrations, 1);
+    }
+
+    /// Remove a pending self-registration, returning whether the address was registered
+    fun remove_registration(lottery: &mut AirdropLottery, participant: address): bool {
+        let shard_id = registration_shard(participant);
+        if (!table_with_length::contains(&lottery.registrations, shard_id)) {
+            return false
+        };
+        
+        let shard = table_with_length::borrow_mut(&mut lottery.registrations, shard_id);
+        if (!smart_table::contains(&shard.index, participant)) {
+            return false
+        };
+        let index = smart_table::remove(&mut shard.index, participant);
+        smart_vector::swap_remove(&mut shard.members, index);
+        if (index < smart_vector::length(&shard.members)) {
+            let moved = *smart_vector::borrow(&shard.members, index);
+            *smart_table::borrow_mut(&mut shard.index, moved) = index;
+        };
+        
+        // Delete the shard once empty, so `has_pending_registrations` does not see it
+        if (smart_vector::is_empty(&shard.members)) {
+            let RegistrationShard { members, index } = table_with_length::remove(&mut lottery.registrations, shard_id);
+            smart_vector::destroy_empty(members);
+            smart_table::destroy_empty(index);
+        };
+        aggregator_v2::sub(&mut lottery.pending_registrations, 1);
+        true
+    }
+
+    /// Move at most `max_count` pending self-registrations into the participant list
+    /// Emptied shards are deleted. Returns the number of registrations moved.
+    fun merge_pending_registrations(lottery: &mut AirdropLottery, max_count: u64): u64 {
+        let merged = 0;
+        let shard_id = 0;
+        while (shard_id < REGISTRATION_SHARDS && merged < max_count) {
+            if (table_with_length::contains(&lottery.registrations, shard_id)) {
+                let shard = table_with_length::borrow_mut(&mut lottery.registrations, shard_id);
+                while (merged < max_count && !smart_vector::is_empty(&shard.members)) {
+                    let participant = smart_vector::pop_back(&mut shard.members);
+                    smart_table::remove(&mut shard.index, participant);
+                    let slot = smart_vector::length(&lottery.participants);
+                    smart_table::add(&mut lottery.participant_index, participant, slot);
+                    smart_vector::push_back(&mut lottery.participants, participant);
+                    push_weight(&mut lottery.participant_weights, 1);
+                    merged = merged + 1;
+                };
+                if (smart_vector::is_empty(&shard.members)) {
+                    let RegistrationShard { members, index } = table_with_length::remove(&mut lottery.registrations, shard_id);
+                    smart_vector::destroy_empty(members);
+                    smart_table::destroy_empty(index);
+                };
+            };
+            shard_id = shard_id + 1;
+        };
+        aggregator_v2::sub(&mut lottery.pending_registrations, merged);
+        merged
+    }
+
+    /// Get the number of participants, including pending self-registrations or committed leaves
+    fun participant_count(lottery: &AirdropLottery): u64 {
+        if (option::is_some(&lottery.archive)) {
+            return option::borrow(&lottery.archive).participant_count
+        };
+        if (option::is_some(&lottery.merkle_participants)) {
+            return option::borrow(&lottery.merkle_participants).leaf_count
+        };
+        smart_vector::length(&lottery.participants) + aggregator_v2::read(&lottery.pending_registrations)
+    }
+
+    /// Get the number of participants the participant views can list
+    /// Once archiving has started, only the stored prefix of the list is left, which is the winners and
+    /// backups when archiving completes; `participant_count` still reports the count before archiving.
+    fun listed_participant_count(lottery: &AirdropLottery): u64 {
+        if (option::is_some(&lottery.archive)) {
+            smart_vector::length(&lottery.participants)
+        } else {
+            participant_count(lottery)
+        }
+    }
+
+    /// Append the participants in positions [start, end) to `page`
+    /// Positions past the merged participant list continue into the pending self-registrations, shard by shard
+    fun append_participants(lottery: &AirdropLottery, start: u64, end: u64, page: &mut vector<address>) {
+        let merged_count = smart_vector::length(&lottery.participants);
+        let i = start;
+        while (i < end && i < merged_count) {
+            vector::push_back(page, *smart_vector::borrow(&lottery.participants, i));
+            i = i + 1;
+        };
+        
+        let shard_start = merged_count;
+        let shard_id = 0;
+        while (i < end && shard_id < REGISTRATION_SHARDS) {
+            if (table_with_length::contains(&lottery.registrations, shard_id)) {
+                let members = &table_with_length::borrow(&lottery.registrations, shard_id).members;
+                let shard_end = shard_start + smart_vector::length(members);
+                while (i < end && i < shard_end) {
+                    vector::push_back(page, *smart_vector::borrow(members, i - shard_start));
+                    i = i + 1;
+                };
+                shard_start = shard_end;
+            };
+            shard_id = shard_id + 1;
+        };
+    }
+
+
+    #[randomness]
+    entry fun draw_winners(
+        account: &signer,
+        lottery_id: u64
+    ) acquires AccountLotteries, AirdropLottery, LotteryIndex {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed or already being drawn in chunks
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        draw_all_winners(lottery);
+    }
+
+    /// Draw several lotteries of the caller in one transaction (creator only)
+    /// Lotteries that cannot be drawn yet (completed, being drawn in chunks, before the deadline or
+    /// without enough participants) are skipped instead of aborting the batch. Each drawn lottery
+    /// emits its completion event, and a `LotteryBatchDrawEvent` reports the drawn and skipped IDs.
+    #[randomness]
+    entry fun draw_winners_batch(
+        account: &signer,
+        lottery_ids: vector<u64>
+    ) acquires AccountLotteries, AirdropLottery, LotteryIndex {
+        let account_addr = signer::address_of(account);
+        assert!(!vector::is_empty(&lottery_ids), error::invalid_argument(E_INVALID_BATCH));
+        
+        let drawn = vector::empty<u64>();
+        let skipped = vector::empty<u64>();
+        let i = 0;
+        let lottery_count = vector::length(&lottery_ids);
+        while (i < lottery_count) {
+            let lottery_id = *vector::borrow(&lottery_ids, i);
+            
+            // Get the lottery, checking that it exists
+            let lottery = borrow_lottery_mut(lottery_id);
+            
+            // Only the creator can execute
+            assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+            
+            if (!lottery.is_completed
+                && !lottery.is_drawing
+                && timestamp::now_seconds() >= lottery.deadline
+                && participant_count(lottery) >= lottery.winner_count) {
+                draw_all_winners(lottery);
+                vector::push_back(&mut drawn, lottery_id);
+            } else {
+                vector::push_back(&mut skipped, lottery_id);
+            };
+            i = i + 1;
+        };
+        
+        // Emit event
+        event::emit(
+            LotteryBatchDrawEvent {
+                creator: account_addr,
+                drawn,
+                skipped,
+            },
+        );
+    }
+
+    /// Draw the winners without storing them (creator only)
+    /// Only the seed is drawn: winner `i` is the participant at position
+    /// `seeded_permutation::apply(seed, participant_count, i)`, evaluated on demand by the views.
+    /// The participant list is frozen by the draw, so the winners never change afterwards.
+    #[randomness]
+    entry fun draw_winners_lazy(
+        account: &signer,
+        lottery_id: u64
+    ) acquires AccountLotteries, AirdropLottery, LotteryIndex {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed or already being drawn in chunks
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        assert!(!lottery.is_drawing, error::invalid_state(E_DRAW_IN_PROGRESS));
+        
+        // Winners of a Merkle-committed lottery are claimed by leaf, which needs the stored leaf indices,
+        // a permutation cannot weight the participants, and promoting a backup moves stored winners
+        assert!(option::is_none(&lottery.merkle_participants), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        assert!(option::is_none(&lottery.participant_weights), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        assert!(lottery.backup_count == 0, error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+        
+        start_draw(lottery);
+        lottery.lazy_winners = true;
+        lottery.draw_cursor = lottery.winner_count;
+        complete_draw(lottery);
+    }
+
+    /// Draw a bounded batch of winners (creator only)
+    /// The first call moves the lottery into the drawing state, and each call selects at most
+    /// `max_winners` more winners, so lotteries too large for a single transaction can be drawn
+    /// over several transactions. Backups are selected after the winners and count towards `max_winners`.
+    /// The lottery is completed by the call that selects the last winner or backup.
+    #[randomness]
+    entry fun draw_winners_chunk(
+        account: &signer,
+        lottery_id: u64,
+        max_winners: u64
+    ) acquires AccountLotteries, AirdropLottery, LotteryIndex {
+        let account_addr = signer::address_of(account);
+        assert!(max_winners > 0, error::invalid_argument(E_INVALID_WINNER_COUNT));
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is not completed
+        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        
+        // The first chunk freezes the participant list
+        if (!lottery.is_drawing) {
+            start_draw(lottery);
+        };
+        
+        // Select the next batch of winners
+        let selection_count = lottery.winner_count + lottery.backup_count;
+        let remaining = selection_count - lottery.draw_cursor;
+        let batch = if (max_winners < remaining) { max_winners } else { remaining };
+        shuffle_and_select(lottery, batch);
+        
+        if (lottery.draw_cursor == selection_count) {
+            complete_draw(lottery);
+        };
+    }
+
+    /// Replace a disqualified winner with the next backup of the waitlist (creator only)
+    /// The backup's slot is swapped with the winner's, so the backup moves into the winner prefix
+    /// of the participant list and the disqualified winner out of it, without another draw.
+    public entry fun promote_backup(
+        account: &signer,
+        lottery_id: u64,
+        winner: address
+    ) acquires AirdropLottery {
+        let account_addr = signer::address_of(account);
+        
+        // Get the lottery, checking that it exists
+        let lottery = borrow_lottery_mut(lottery_id);
+        
+        // Only the creator can execute
+        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        
+        // Check if the lottery is completed and its list is still stored in draw order
+        assert!(lottery.is_completed, error::invalid_state(E_LOTTERY_NOT_COMPLETED));
+        assert!(option::is_none(&lottery.archive), error::invalid_state(E_ALREADY_ARCHIVED));
+        assert!(lottery.promoted_backups < lottery.backup_count, error::invalid_state(E_NO_BACKUP_LEFT));
+        
+        // Check if the address is a current winner
+        assert!(smart_table::contains(&lottery.participant_index, winner), error::invalid_argument(E_NOT_A_WINNER));
+        let position = *smart_table::borrow(&lottery.participant_index, winner);
+        assert!(position < lottery.winner_count, error::invalid_argument(E_NOT_A_WINNER));
+        
+        // Winner `i` is stored at position `i`, and the next backup follows the promoted ones
+        let backup_position = lottery.winner_count + lottery.promoted_backups;
+        swap_participants(lottery, position, backup_position);
+        let promoted = *smart_vector::borrow(&lottery.participants, position);
+        *smart_vector::borrow_mut(&mut lottery.winners, position) = promoted;
+        lottery.promoted_backups = lottery.promoted_backups + 1;
+        
+        // Emit event
+        event::emit(
+            BackupPromotionEvent {
+                lottery_id,
+                disqualified: winner,
+                promoted,
+            },
+        );
+    }
+
+    /// Select all winners and backups of a lottery at once and complete it
+    /// Draws the losers instead when most participants win and there is no waitlist to order.
+    fun draw_all_winners(lottery: &mut AirdropLottery) acquires AccountLotteries, LotteryIndex {
+        start_draw(lottery);
+        let winner_count = lottery.winner_count;
+        let participant_count = participant_count(lottery);
+        if (option::is_none(&lottery.merkle_participants)
+            && option::is_none(&lottery.participant_weights)
+            && lottery.backup_count == 0
+            && winner_count > participant_count - winner_count) {
+            select_by_complement(lottery);
+        } else {
+            shuffle_and_select(lottery, winner_count + lottery.backup_count);
+        };
+        complete_draw(lottery);
+    }
+
+    /// Check that the lottery can be drawn and move it into the drawing state
+    fun start_draw(lottery: &mut AirdropLottery) {
+        // Check if the deadline has been reached
+        assert!(timestamp::now_seconds() >= lottery.deadline, error::invalid_state(E_DEADLINE_NOT_REACHED));
+        
+        // Merge the remaining self-registrations into the participant list
+        let pending = aggregator_v2::read(&lottery.pending_registrations);
+        merge_pending_registrations(lottery, pending);
+        
+        // Check if the number of participants is at least the number of winners
+        let participant_count = participant_count(lottery);
+        assert!(participant_count >= lottery.winner_count, error::invalid_argument(E_INSUFFICIENT_PARTICIPANTS));
+        
+        // The waitlist is cut short when fewer participants than requested are left after the winners
+        let available_backups = participant_count - lottery.winner_count;
+        if (lottery.backup_count > available_backups) {
+            lottery.backup_count = available_backups;
+        };
+        
+        // Draw the only random value of the draw; winner indices are derived from it
+        lottery.seed = randomness::bytes(32);
+        lottery.seed_counter = 0;
+        lottery.is_drawing = true;
+    }
+
+    /// Mark the lottery as completed and emit the completion event
+    fun complete_draw(lottery: &mut AirdropLottery) acquires AccountLotteries, LotteryIndex {
+        lottery.is_drawing = false;
+        lottery.is_completed = true;
+        
+        // Move the lottery to the creator's completed index
+        let account_lotteries = borrow_global_mut<AccountLotteries>(lottery.creator);
+        big_ordered_map::remove(
+            &mut account_lotteries.pending_lotteries,
+            &DeadlineKey { deadline: lottery.deadline, lottery_id: lottery.lottery_id }
+        );
+        big_ordered_map::add(&mut account_lotteries.completed_lotteries, lottery.lottery_id, timestamp::now_seconds());
+        unindex_pending(lottery.lottery_id, lottery.deadline);
+        index_completed(lottery.lottery_id, lottery.creator);
+        
+        // Emit event
+        event::emit(
+            LotteryCompletionEvent {
+                lottery_id: lottery.lottery_id,
+                winners: smart_vector::to_vector(&lottery.winners),
+            },
+        );
+        if (option::is_some(&lottery.merkle_participants)) {
+            event::emit(
+                WinningLeavesEvent {
+                    lottery_id: lottery.lottery_id,
+                    leaf_indices: smart_vector::to_vector(&option::borrow(&lottery.merkle_participants).winning_leaves),
+                },
+            );
+        };
+    }
+
+    /// Select the next `count` winners with a partial Fisher-Yates shuffle
+    /// Each pick swaps a random remaining participant into the prefix of the list, so the draw
+    /// costs one swap per winner and never shifts or copies the participant list. The prefix
+    /// before `draw_cursor` always holds the winners selected so far, followed by the backups once
+    /// the cursor passes `winner_count`; only winners are stored in `winners`. Indices come from the
+    /// stream derived from the lottery's seed (see `random_stream`), so the draw can be replayed off-chain.
+    fun shuffle_and_select(lottery: &mut AirdropLottery, count: u64) {
+        if (option::is_some(&lottery.merkle_participants)) {
+            return select_winning_leaves(lottery, count)
+        };
+        if (option::is_some(&lottery.participant_weights)) {
+            return select_weighted(lottery, count)
+        };
+        
+        let total = smart_vector::length(&lottery.participants);
+        assert!(lottery.draw_cursor + count <= total, error::invalid_argument(E_INSUFFICIENT_PARTICIPANTS));
+        
+        let i = lottery.draw_cursor;
+        let end = i + count;
+        while (i < end) {
+            let (rand_index, next_counter) = random_stream::index_in_range(&lottery.seed, lottery.seed_counter, i, total);
+            lottery.seed_counter = next_counter;
+            swap_participants(lottery, i, rand_index);
+            if (i < lottery.winner_count) {
+                let winner = *smart_vector::borrow(&lottery.participants, i);
+                smart_vector::push_back(&mut lottery.winners, winner);
+            };
+            i = i + 1;
+        };
+        lottery.draw_cursor = end;
+    }
+
+    /// Select the next `count` winners of a weighted lottery without replacement
+    /// Each pick draws an offset below the total weight of the remaining participants, finds its
+    /// participant with the Fenwick tree, removes its weight from the tree and swaps it into the
+    /// prefix of the list like the unweighted draw, so each pick costs O(log N).
+    fun select_weighted(lottery: &mut AirdropLottery, count: u64) {
+        let total = smart_vector::length(&lottery.participants);
+        assert!(lottery.draw_cursor + count <= total, error::invalid_argument(E_INSUFFICIENT_PARTICIPANTS));
+        
+        let i = lottery.draw_cursor;
+        let end = i + count;
+        while (i < end) {
+            let weights = option::borrow_mut(&mut lottery.participant_weights);
+            let total_weight = fenwick_tree::total(&weights.tree);
+            let (offset, next_counter) = random_stream::index_in_range(&lottery.seed, lottery.seed_counter, 0, total_weight);
+            lottery.seed_counter = next_counter;
+            let rand_index = fenwick_tree::find(&weights.tree, offset);
+            fenwick_tree::decrease(&mut weights.tree, rand_index, *smart_vector::borrow(&weights.weights, rand_index));
+            swap_participants(lottery, i, rand_index);
+            if (i < lottery.winner_count) {
+                let winner = *smart_vector::borrow(&lottery.participants, i);
+                smart_vector::push_back(&mut lottery.winners, winner);
+            };
+            i = i + 1;
+        };
+        lottery.draw_cursor = end;
+    }
+
+    /// Select all winners by drawing the losers, for lotteries where most participants win
+    /// Runs the partial Fisher-Yates shuffle from the back of the list: each of the N - K steps swaps a
+    /// random participant of the remaining prefix into the suffix of losers, so the draw makes
+    /// min(K, N - K) random picks overall. The winners are the first K participants in list order.
+    fun select_by_complement(lottery: &mut AirdropLottery) {
+        let total = smart_vector::length(&lottery.participants);
+        let count = lottery.winner_count;
+        
+        let i = total;
+        while (i > count) {
+            i = i - 1;
+            let (rand_index, next_counter) = random_stream::index_in_range(&lottery.seed, lottery.seed_counter, 0, i + 1);
+            lottery.seed_counter = next_counter;
+            swap_participants(lottery, i, rand_index);
+        };
+        
+        let i = 0;
+        while (i < count) {
+            let winner = *smart_vector::borrow(&lottery.participants, i);
+            smart_vector::push_back(&mut lottery.winners, winner);
+            i = i + 1;
+        };
+        lottery.draw_cursor = count;
+    }
+
+    /// Select the next `count` winning leaves of a Merkle-committed lottery
+    /// Runs the same partial Fisher-Yates shuffle over the leaf indices [0, leaf_count) without storing
+    /// them: only positions moved by a swap are recorded, so storage grows with the winners only.
+    fun select_winning_leaves(lottery: &mut AirdropLottery, count: u64) {
+        let commitment = option::borrow_mut(&mut lottery.merkle_participants);
+        let total = commitment.leaf_count;
+        assert!(lottery.draw_cursor + count <= total, error::invalid_argument(E_INSUFFICIENT_PARTICIPANTS));
+        
+        let i = lottery.draw_cursor;
+        let end = i + count;
+        while (i < end) {
+            let (rand_index, next_counter) = random_stream::index_in_range(&lottery.seed, lottery.seed_counter, i, total);
+            lottery.seed_counter = next_counter;
+            let leaf_at_i = leaf_at(&commitment.leaf_swaps, i);
+            let winning_leaf = leaf_at(&commitment.leaf_swaps, rand_index);
+            smart_table::upsert(&mut commitment.leaf_swaps, rand_index, leaf_at_i);
+            smart_vector::push_back(&mut commitment.winning_leaves, winning_leaf);
+            smart_table::add(&mut commitment.claims, winning_leaf, @0x0);
+            i = i + 1;
+        };
+        lottery.draw_cursor = end;
+    }
+
+    /// Get the leaf index at a position of the virtual leaf list
+    fun leaf_at(leaf_swaps: &SmartTable<u64, u64>, position: u64): u64 {
+        if (smart_table::contains(leaf_swaps, position)) {
+            *smart_table::borrow(leaf_swaps, position)
+        } else {
+            position
+        }
+    }
+
+    /// Get winner `i` of a lazily drawn lottery
+    fun lazy_winner_at(lottery: &AirdropLottery, i: u64): address {
+        let total = smart_vector::length(&lottery.participants);
+        *smart_vector::borrow(&lottery.participants, seeded_permutation::apply(&lottery.seed, total, i))
+    }
+
+    /// Swap two participant slots and keep the address index in sync
+    /// The swap is performed even when both slots are equal so gas usage does not depend on the random outcome
+    fun swap_participants(lottery: &mut AirdropLottery, i: u64, j: u64) {
+        smart_vector::swap(&mut lottery.participants, i, j);
+        let first = *smart_vector::borrow(&lottery.participants, i);
+        let second = *smart_vector::borrow(&lottery.participants, j);
+        *smart_table::borrow_mut(&mut lottery.participant_index, first) = i;
+        *smart_table::borrow_mut(&mut lottery.participant_index, second) = j;
+        // No `i != j` shortcut: the weights and their tree walks are swapped even for equal slots, so a
+        // weighted draw costs the same whichever participant is picked
+        if (option::is_some(&lottery.participant_weights)) {
+            let weights = option::borrow_mut(&mut lottery.participant_weights);
+            smart_vector::swap(&mut weights.weights, i, j);
+            let tree_i = tree_weight(&weights.tree, i);
+            let tree_j = tree_weight(&weights.tree, j);
+            set_tree_weight(&mut weights.tree, i, tree_i, tree_j);
+            set_tree_weight(&mut weights.tree, j, tree_j, tree_i);
+        };
+    }
+
+    /// Make a lottery weighted if it is not yet, which is only allowed while no participants are stored
+    fun make_weighted(lottery: &mut AirdropLottery) {
+        if (option::is_none(&lottery.participant_weights)) {
+            assert!(smart_vector::is_empty(&lottery.participants), error::invalid_state(E_INVALID_PARTICIPANT_MODE));
+            option::fill(&mut lottery.participant_weights, ParticipantWeights {
+                weights: smart_vector::new<u64>(),
+                tree: fenwick_tree::new(),
+            });
+        };
+    }
+
+    /// Append the weight of a new participant if the lottery is weighted
+    fun push_weight(participant_weights: &mut Option<ParticipantWeights>, weight: u64) {
+        if (option::is_some(participant_weights)) {
+            let weights = option::borrow_mut(participant_weights);
+            smart_vector::push_back(&mut weights.weights, weight);
+            fenwick_tree::push_back(&mut weights.tree, weight);
+        };
+    }
+
+    /// Remove the weight at `index` by moving the last weight into its slot, like `smart_vector::swap_remove`
+    fun swap_remove_weight(participant_weights: &mut Option<ParticipantWeights>, index: u64) {
+        if (option::is_some(participant_weights)) {
+            let weights = option::borrow_mut(participant_weights);
+            let last = smart_vector::length(&weights.weights) - 1;
+            let removed = tree_weight(&weights.tree, index);
+            let moved = tree_weight(&weights.tree, last);
+            set_tree_weight(&mut weights.tree, index, removed, moved);
+            fenwick_tree::pop_back(&mut weights.tree);
+            smart_vector::swap_remove(&mut weights.weights, index);
+        };
+    }
+
+    /// Get the weight currently stored in the tree at `index`
+    fun tree_weight(tree: &FenwickTree, index: u64): u64 {
+        fenwick_tree::prefix_sum(tree, index + 1) - fenwick_tree::prefix_sum(tree, index)
+    }
+
+    /// Change the weight stored in the tree at `index` from `old_weight` to `new_weight`
+    /// Equal weights still walk the tree with a zero delta, so gas does not depend on the weights swapped.
+    fun set_tree_weight(tree: &mut FenwickTree, index: u64, old_weight: u64, new_weight: u64) {
+        if (new_weight >= old_weight) {
+            fenwick_tree::increase(tree, index, new_weight - old_weight);
+        } else {
+            fenwick_tree::decrease(tree, index, old_weight - new_weight);
+        };
+    }
+
+
+    /// Register an account as a creator on its first lottery
+    /// This is the only write to `ModuleData` after initialization.
+    fun register_creator(account: &signer) acquires ModuleData {
+        let account_addr = signer::address_of(account);
+        if (!exists<AccountLotteries>(account_addr)) {
+            let module_data = borrow_global_mut<ModuleData>(@airdrop_lottery_addr);
+            let creator_index = smart_vector::length(&module_data.creators);
+            smart_vector::push_back(&mut module_data.creators, account_addr);
+            move_to(account, AccountLotteries {
+                creator_index,
+                next_sequence: 1,
+                created_lotteries: big_ordered_map::new<u64, u64>(),
+                pending_lotteries: big_ordered_map::new<DeadlineKey, u64>(),
+                completed_lotteries: big_ordered_map::new<u64, u64>(),
+            });
+        };
+    }
+
+    /// Get the shard of the global lottery index that holds a lottery
+    /// Mixes the creator index into the sequence number, so the first lotteries of different creators
+    /// fall into different shards.
+    fun index_shard(lottery_id: u64): u64 {
+        (lottery_id ^ (lottery_id >> SEQUENCE_BITS)) % INDEX_SHARDS
+    }
+
+    /// Add a lottery to the pending shards of the global lottery index
+    fun index_pending(lottery_id: u64, deadline: u64, creator: address) acquires LotteryIndex {
+        let lottery_index = borrow_global_mut<LotteryIndex>(@airdrop_lottery_addr);
+        let shard = table::borrow_mut(&mut lottery_index.pending, index_shard(lottery_id));
+        big_ordered_map::add(shard, DeadlineKey { deadline, lottery_id }, creator);
+    }
+
+    /// Remove a lottery from the pending shards of the global lottery index
+    fun unindex_pending(lottery_id: u64, deadline: u64) acquires LotteryIndex {
+        let lottery_index = borrow_global_mut<LotteryIndex>(@airdrop_lottery_addr);
+        let shard = table::borrow_mut(&mut lottery_index.pending, index_shard(lottery_id));
+        big_ordered_map::remove(shard, &DeadlineKey { deadline, lottery_id });
+    }
+
+    /// Add a lottery to the completed shards of the global lottery index
+    fun index_completed(lottery_id: u64, creator: address) acquires LotteryIndex {
+        let lottery_index = borrow_global_mut<LotteryIndex>(@airdrop_lottery_addr);
+        big_ordered_map::add(table::borrow_mut(&mut lottery_index.completed, index_shard(lottery_id)), lottery_id, creator);
+    }
+
+    /// Remove a lottery from the completed shards of the global lottery index
+    fun unindex_completed(lottery_id: u64) acquires LotteryIndex {
+        let lottery_index = borrow_global_mut<LotteryIndex>(@airdrop_lottery_addr);
+        big_ordered_map::remove(table::borrow_mut(&mut lottery_index.completed, index_shard(lottery_id)), &lottery_id);
+    }
+
+    /// Create an empty set of shard heads, merged in ascending or descending key order
+    fun new_shard_heads<K: copy + drop>(descending: bool): ShardHeads<K> {
+        ShardHeads { keys: vector::empty<K>(), shards: vector::empty<u64>(), descending }
+    }
+
+    /// Check if a key comes before another in the merge order of the heads
+    fun precedes<K: copy + drop>(heads: &ShardHeads<K>, a: &K, b: &K): bool {
+        let order = cmp::compare(a, b);
+        if (heads.descending) {
+            cmp::is_gt(&order)
+        } else {
+            cmp::is_lt(&order)
+        }
+    }
+
+    /// Add the next key of a shard to the heads
+    fun push_head<K: copy + drop>(heads: &mut ShardHeads<K>, key: K, shard_id: u64) {
+        vector::push_back(&mut heads.keys, key);
+        vector::push_back(&mut heads.shards, shard_id);
+        
+        // Sift the new key up to its place
+        let i = vector::length(&heads.keys) - 1;
+        while (i > 0) {
+            let parent = (i - 1) / 2;
+            if (!precedes(heads, vector::borrow(&heads.keys, i), vector::borrow(&heads.keys, parent))) {
+                break
+            };
+            vector::swap(&mut heads.keys, i, parent);
+            vector::swap(&mut heads.shards, i, parent);
+            i = parent;
+        };
+    }
+
+    /// Remove and return the first key of the heads in merge order, with its shard
+    fun pop_head<K: copy + drop>(heads: &mut ShardHeads<K>): (K, u64) {
+        let last = vector::length(&heads.keys) - 1;
+        vector::swap(&mut heads.keys, 0, last);
+        vector::swap(&mut heads.shards, 0, last);
+        let key = vector::pop_back(&mut heads.keys);
+        let shard_id = vector::pop_back(&mut heads.shards);
+        
+        // Sift the moved key down to its place
+        let length = last;
+        let i = 0;
+        loop {
+            let first = i;
+            let left = 2 * i + 1;
+            let right = left + 1;
+            if (left < length && precedes(heads, vector::borrow(&heads.keys, left), vector::borrow(&heads.keys, first))) {
+                first = left;
+            };
+            if (right < length && precedes(heads, vector::borrow(&heads.keys, right), vector::borrow(&heads.keys, first))) {
+                first = right;
+            };
+            if (first == i) {
+                break
+            };
+            vector::swap(&mut heads.keys, i, first);
+            vector::swap(&mut heads.shards, i, first);
+            i = first;
+        };
+        (key, shard_id)
+    }
+
+    /// Create the state of a new lottery
+    fun new_lottery(
+        lottery_id: u64,
+        name: String,
+        description: String,
+        winner_count: u64,
+        backup_count: u64,
+        deadline: u64,
+        creator: address
+    ): AirdropLottery {
+        AirdropLottery {
+            lottery_id,
+            name,
+            description,
+            participants: smart_vector::new<address>(),
+            participant_index: smart_table::new<address, u64>(),
+            registrations: table_with_length::new<u64, RegistrationShard>(),
+            pending_registrations: aggregator_v2::create_unbounded_aggregator<u64>(),
+            allow_self_registration: false,
+            merkle_participants: option::none<MerkleParticipants>(),
+            participant_weights: option::none<ParticipantWeights>(),
+            archive: option::none<ParticipantArchive>(),
+            winners: smart_vector::new<address>(),
+            winner_count,
+            backup_count,
+            promoted_backups: 0,
+            is_completed: false,
+            is_drawing: false,
+            draw_cursor: 0,
+            seed: vector::empty<u8>(),
+            seed_counter: 0,
+            lazy_winners: false,
+            is_deleted: false,
+            creator,
+            created_at: timestamp::now_seconds(),
+            deadline,
+        }
+    }
+
+    /// Save a lottery in its own object under the factory, addressed by the lottery ID
+    fun store_lottery(factory_signer: &signer, lottery: AirdropLottery) {
+        let constructor_ref = object::create_named_object(factory_signer, bcs::to_bytes(&lottery.lottery_id));
+        move_to(&object::generate_signer(&constructor_ref), lottery);
+    }
+
+    /// Delete up to `max_count` entries of a deleted lottery's storage
+    /// Returns true once nothing is left but the empty containers, which `destroy_lottery` then frees.
+    fun purge_entries(lottery: &mut AirdropLottery, max_count: u64): bool {
+        let freed = 0;
+        
+        // Participants from the back of the list, so every index entry left stays valid
+        while (freed < max_count && !smart_vector::is_empty(&lottery.participants)) {
+            let participant = smart_vector::pop_back(&mut lottery.participants);
+            smart_table::remove(&mut lottery.participant_index, participant);
+            freed = freed + 1;
+        };
+        
+        if (option::is_some(&lottery.participant_weights)) {
+            let weights = option::borrow_mut(&mut lottery.participant_weights);
+            while (freed < max_count && !smart_vector::is_empty(&weights.weights)) {
+                smart_vector::pop_back(&mut weights.weights);
+                fenwick_tree::pop_back(&mut weights.tree);
+                freed = freed + 1;
+            };
+        };
+        
+        // Self-registrations, removing each shard once it is empty
+        let shard_id = 0;
+        while (freed < max_count && shard_id < REGISTRATION_SHARDS) {
+            if (table_with_length::contains(&lottery.registrations, shard_id)) {
+                let shard = table_with_length::borrow_mut(&mut lottery.registrations, shard_id);
+                while (freed < max_count && !smart_vector::is_empty(&shard.members)) {
+                    let member = smart_vector::pop_back(&mut shard.members);
+                    smart_table::remove(&mut shard.index, member);
+                    freed = freed + 1;
+                };
+                if (smart_vector::is_empty(&shard.members)) {
+                    let RegistrationShard { members, index } = table_with_length::remove(&mut lottery.registrations, shard_id);
+                    smart_vector::destroy_empty(members);
+                    smart_table::destroy_empty(index);
+                };
+            };
+            shard_id = shard_id + 1;
+        };
+        
+        while (freed < max_count && !smart_vector::is_empty(&lottery.winners)) {
+            smart_vector::pop_back(&mut lottery.winners);
+            freed = freed + 1;
+        };
+        
+        if (option::is_some(&lottery.merkle_participants)) {
+            let commitment = option::borrow_mut(&mut lottery.merkle_participants);
+            let drawn = smart_vector::length(&commitment.winning_leaves);
+            
+            // Replay the draw to find the positions it moved; a position can be moved more than once
+            while (freed < max_count && lottery.draw_cursor < drawn) {
+                let (rand_index, next_counter) = random_stream::index_in_range(
+                    &lottery.seed, lottery.seed_counter, lottery.draw_cursor, commitment.leaf_count
+                );
+                lottery.seed_counter = next_counter;
+                if (smart_table::contains(&commitment.leaf_swaps, rand_index)) {
+                    smart_table::remove(&mut commitment.leaf_swaps, rand_index);
+                };
+                lottery.draw_cursor = lottery.draw_cursor + 1;
+                freed = freed + 1;
+            };
+            
+            // Winning leaves once the replay no longer needs their count, with their claims
+            while (freed < max_count && lottery.draw_cursor == drawn && !smart_vector::is_empty(&commitment.winning_leaves)) {
+                let leaf = smart_vector::pop_back(&mut commitment.winning_leaves);
+                let claimant = smart_table::remove(&mut commitment.claims, leaf);
+                // An address listed in several leaves can claim each of them but has a single claimant entry
+                if (claimant != @0x0 && smart_table::contains(&commitment.claimants, claimant)) {
+                    smart_table::remove(&mut commitment.claimants, claimant);
+                };
+                freed = freed + 1;
+            };
+        };
+        
+        freed < max_count
+    }
+
+    /// Destroy a lottery and all of its storage
+    fun destroy_lottery(lottery: AirdropLottery) {
+        let AirdropLottery {
+            lottery_id: _,
+            name: _,
+            description: _,
+            participants,
+            participant_index,
+            registrations,
+            pending_registrations: _,
+            allow_self_registration: _,
+            merkle_participants,
+            participant_weights,
+            archive,
+            winners,
+            winner_count: _,
+            backup_count: _,
+            promoted_backups: _,
+            is_completed: _,
+            is_drawing: _,
+            draw_cursor: _,
+            seed: _,
+            seed_counter: _,
+            lazy_winners: _,
+            is_deleted: _,
+            creator: _,
+            created_at: _,
+            deadline: _,
+        } = lottery;
+        smart_vector::destroy(participants);
+        smart_table::destroy(participant_index);
+        smart_vector::destroy(winners);
+        
+        // Self-registrations live in at most REGISTRATION_SHARDS shards
+        let shard_id = 0;
+        while (shard_id < REGISTRATION_SHARDS) {
+            if (table_with_length::contains(&registrations, shard_id)) {
+                let RegistrationShard { members, index } = table_with_length::remove(&mut registrations, shard_id);
+                smart_vector::destroy(members);
+                smart_table::destroy(index);
+            };
+            shard_id = shard_id + 1;
+        };
+        table_with_length::destroy_empty(registrations);
+        
+        if (option::is_some(&merkle_participants)) {
+            let MerkleParticipants { root: _, leaf_count: _, leaf_swaps, winning_leaves, claims, claimants } =
+                option::destroy_some(merkle_participants);
+            smart_table::destroy(leaf_swaps);
+            smart_vector::destroy(winning_leaves);
+            smart_table::destroy(claims);
+            smart_table::destroy(claimants);
+        } else {
+            option::destroy_none(merkle_participants);
+        };
+        
+        if (option::is_some(&participant_weights)) {
+            let ParticipantWeights { weights, tree } = option::destroy_some(participant_weights);
+            smart_vector::destroy(weights);
+            fenwick_tree::destroy(tree);
+        } else {
+            option::destroy_none(participant_weights);
+        };
+        
+        if (option::is_some(&archive)) {
+            let ParticipantArchive { participant_count: _, archived_count: _, frontier: _, root: _ } = option::destroy_some(archive);
+        } else {
+            option::destroy_none(archive);
+        };
+    }
+
+    /// Compute the address of the object that stores a lottery
+    fun lottery_address(lottery_id: u64): address {
+        let factory_addr = object::create_object_address(&@airdrop_lottery_addr, LOTTERY_FACTORY_SEED);
+        object::create_object_address(&factory_addr, bcs::to_bytes(&lottery_id))
+    }
+
+    /// Check if a lottery exists and has not been deleted
+    fun lottery_exists(lottery_id: u64): bool acquires AirdropLottery {
+        let lottery_addr = lottery_address(lottery_id);
+        exists<AirdropLottery>(lottery_addr) && !borrow_global<AirdropLottery>(lottery_addr).is_deleted
+    }
+
+    /// Borrow a lottery, aborting if it does not exist
+    fun borrow_lottery(lottery_id: u64): &AirdropLottery acquires AirdropLottery {
+        assert!(lottery_exists(lottery_id), error::not_found(E_LOTTERY_NOT_FOUND));
+        borrow_global<AirdropLottery>(lottery_address(lottery_id))
+    }
+
+    /// Mutably borrow a lottery, aborting if it does not exist
+    fun borrow_lottery_mut(lottery_id: u64): &mut AirdropLottery acquires AirdropLottery {
+        assert!(lottery_exists(lottery_id), error::not_found(E_LOTTERY_NOT_FOUND));
+        borrow_global_mut<AirdropLottery>(lottery_address(lottery_id))
+    }
+
+
+    #[view]
+    public fun get_lottery_address(lottery_id: u64): address {
+        let lottery_addr = lottery_address(lottery_id);
+        assert!(exists<AirdropLottery>(lottery_addr), error::not_found(E_LOTTERY_NOT_FOUND));
+        lottery_addr
+    }
+
+
+    #[view]
+    public fun get_lottery_details(lottery_id: u64): (String, String, u64, u64, bool, address, u64, u64) acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        
+        (
+            *&lottery.name,
+            *&lottery.description,
+            lottery.winner_count,
+            participant_count(lottery),
+            lottery.is_completed,
+            lottery.creator,
+            lottery.created_at,
+            lottery.deadline
+        )
+    }
+
+
+    #[view]
+    /// Get the details of several lotteries in one call, in the order of `lottery_ids`
+    /// IDs of lotteries that do not exist, such as deleted ones, are skipped instead of failing the
+    /// whole call, so match the summaries by `lottery_id`. Set `include_text` to false to leave out
+    /// the name and description.
+    public fun get_lottery_details_batch(lottery_ids: vector<u64>, include_text: bool): vector<LotterySummary> acquires AirdropLottery {
+        let summaries = vector::empty<LotterySummary>();
+        let i = 0;
+        let lottery_count = vector::length(&lottery_ids);
+        while (i < lottery_count) {
+            let lottery_id = *vector::borrow(&lottery_ids, i);
+            if (lottery_exists(lottery_id)) {
+                let lottery = borrow_lottery(lottery_id);
+                vector::push_back(&mut summaries, LotterySummary {
+                    lottery_id: lottery.lottery_id,
+                    name: if (include_text) { *&lottery.name } else { string::utf8(b"") },
+                    description: if (include_text) { *&lottery.description } else { string::utf8(b"") },
+                    winner_count: lottery.winner_count,
+                    participant_count: participant_count(lottery),
+                    is_completed: lottery.is_completed,
+                    creator: lottery.creator,
+                    created_at: lottery.created_at,
+                    deadline: lottery.deadline,
+                });
+            };
+            i = i + 1;
+        };
+        summaries
+    }
+
+    /// Get the lottery ID of a lottery summary
+    public fun summary_lottery_id(summary: &LotterySummary): u64 {
+        summary.lottery_id
+    }
+
+    /// Get the name (empty if the text fields were left out) of a lottery summary
+    public fun summary_name(summary: &LotterySummary): String {
+        *&summary.name
+    }
+
+    /// Get the description (empty if the text fields were left out) of a lottery summary
+    public fun summary_description(summary: &LotterySummary): String {
+        *&summary.description
+    }
+
+    /// Get the number of winners of a lottery summary
+    public fun summary_winner_count(summary: &LotterySummary): u64 {
+        summary.winner_count
+    }
+
+    /// Get the number of participants of a lottery summary
+    public fun summary_participant_count(summary: &LotterySummary): u64 {
+        summary.participant_count
+    }
+
+    /// Get the whether the winners have been drawn of a lottery summary
+    public fun summary_is_completed(summary: &LotterySummary): bool {
+        summary.is_completed
+    }
+
+    /// Get the creator of a lottery summary
+    public fun summary_creator(summary: &LotterySummary): address {
+        summary.creator
+    }
+
+    /// Get the creation time of a lottery summary
+    public fun summary_created_at(summary: &LotterySummary): u64 {
+        summary.created_at
+    }
+
+    /// Get the deadline of a lottery summary
+    public fun summary_deadline(summary: &LotterySummary): u64 {
+        summary.deadline
+    }
+
+
+    #[view]
+    /// Get the participants of a lottery
+    /// Archived lotteries only list the participants still stored (see `listed_participant_count`).
+    public fun get_participants(lottery_id: u64): vector<address> acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        let participants = vector::empty<address>();
+        append_participants(lottery, 0, listed_participant_count(lottery), &mut participants);
+        participants
+    }
+
+
+    #[view]
+    /// Get a page of at most `limit` participants starting at `offset`, together with the total count
+    /// Participants are borrowed one by one, so the list is never copied as a whole. For archived
+    /// lotteries the total is the number of participants still stored, not the count before archiving.
+    public fun get_participants_page(lottery_id: u64, offset: u64, limit: u64): (vector<address>, u64) acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        let total = listed_participant_count(lottery);
+        
+        let page = vector::empty<address>();
+        let end = if (offset < total && limit < total - offset) { offset + limit } else { total };
+        append_participants(lottery, offset, end, &mut page);
+        
+        (page, total)
+    }
+
+
+    #[view]
+    public fun get_winners(lottery_id: u64): vector<address> acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        if (!lottery.is_completed) {
+            return vector::empty<address>()
+        };
+        if (!lottery.lazy_winners) {
+            return smart_vector::to_vector(&lottery.winners)
+        };
+        
+        let winners = vector::empty<address>();
+        let i = 0;
+        while (i < lottery.winner_count) {
+            vector::push_back(&mut winners, lazy_winner_at(lottery, i));
+            i = i + 1;
+        };
+        winners
+    }
+
+
+    #[view]
+    /// Get the backups of a completed lottery that have not been promoted yet, in waitlist order
+    public fun get_backups(lottery_id: u64): vector<address> acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        let backups = vector::empty<address>();
+        if (!lottery.is_completed) {
+            return backups
+        };
+        
+        let i = lottery.winner_count + lottery.promoted_backups;
+        let end = lottery.winner_count + lottery.backup_count;
+        while (i < end) {
+            vector::push_back(&mut backups, *smart_vector::borrow(&lottery.participants, i));
+            i = i + 1;
+        };
+        backups
+    }
+
+
+    #[view]
+    /// Check if an address is a participant of a lottery, either added or self-registered
+    /// Participants of a Merkle-committed lottery are not stored, so this is false for them. The same holds
+    /// for archived participants: once a lottery is archived, only its winners and backups are still
+    /// participants here, and others prove their entry against `get_participants_root`.
+    public fun is_participant(lottery_id: u64, addr: address): bool acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        is_registered(lottery, addr)
+    }
+
+
+    #[view]
+    /// Get the weight of a participant (1 for participants of unweighted lotteries, 0 for non-participants)
+    public fun get_participant_weight(lottery_id: u64, addr: address): u64 acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        if (!is_registered(lottery, addr)) {
+            return 0
+        };
+        if (option::is_none(&lottery.participant_weights) || !smart_table::contains(&lottery.participant_index, addr)) {
+            return 1
+        };
+        let slot = *smart_table::borrow(&lottery.participant_index, addr);
+        *smart_vector::borrow(&option::borrow(&lottery.participant_weights).weights, slot)
+    }
+
+
+    #[view]
+    /// Get the ticket numbers [start, end) of a participant of a weighted lottery
+    /// Tickets are numbered consecutively in participant list order, so the range is the participant's
+    /// cumulative ticket offset. Ranges are only defined before the draw starts; (0, 0) otherwise.
+    public fun get_ticket_range(lottery_id: u64, addr: address): (u64, u64) acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        if (lottery.is_drawing
+            || lottery.is_completed
+            || option::is_none(&lottery.participant_weights)
+            || !smart_table::contains(&lottery.participant_index, addr)) {
+            return (0, 0)
+        };
+        let slot = *smart_table::borrow(&lottery.participant_index, addr);
+        let weights = option::borrow(&lottery.participant_weights);
+        let start = fenwick_tree::prefix_sum(&weights.tree, slot);
+        (start, start + *smart_vector::borrow(&weights.weights, slot))
+    }
+
+
+    #[view]
+    /// Get the owner of a ticket number of a weighted lottery by binary search over the cumulative ticket offsets
+    /// Returns the total number of tickets as well; the owner is @0x0 for numbers past the total or once the draw has started.
+    public fun get_ticket_owner(lottery_id: u64, ticket: u64): (address, u64) acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        if (lottery.is_drawing || lottery.is_completed || option::is_none(&lottery.participant_weights)) {
+            return (@0x0, 0)
+        };
+        let tree = &option::borrow(&lottery.participant_weights).tree;
+        let total_tickets = fenwick_tree::total(tree);
+        if (ticket >= total_tickets) {
+            return (@0x0, total_tickets)
+        };
+        (*smart_vector::borrow(&lottery.participants, fenwick_tree::find(tree, ticket)), total_tickets)
+    }
+
+
+    #[view]
+    /// Check if an address won a completed lottery
+    /// Winners of a Merkle-committed lottery count once they have claimed.
+    public fun is_winner(lottery_id: u64, addr: address): bool acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        if (!lottery.is_completed) {
+            return false
+        };
+        if (option::is_some(&lottery.merkle_participants)) {
+            return smart_table::contains(&option::borrow(&lottery.merkle_participants).claimants, addr)
+        };
+        if (!smart_table::contains(&lottery.participant_index, addr)) {
+            return false
+        };
+        let position = *smart_table::borrow(&lottery.participant_index, addr);
+        if (lottery.lazy_winners) {
+            // Map the participant's position back to its draw order
+            let total = smart_vector::length(&lottery.participants);
+            seeded_permutation::invert(&lottery.seed, total, position) < lottery.winner_count
+        } else {
+            // The partial shuffle leaves the winners at the front of the participant list
+            position < lottery.winner_count
+        }
+    }
+
+
+    #[view]
+    /// Get the Merkle root and leaf count committed for a lottery, or recorded when it was archived
+    /// (empty root if none)
+    public fun get_participants_root(lottery_id: u64): (vector<u8>, u64) acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        if (option::is_some(&lottery.archive)) {
+            let archive = option::borrow(&lottery.archive);
+            if (archive.archived_count < archive.participant_count) {
+                return (vector::empty<u8>(), 0)
+            };
+            return (*&archive.root, archive.participant_count)
+        };
+        if (option::is_none(&lottery.merkle_participants)) {
+            return (vector::empty<u8>(), 0)
+        };
+        let commitment = option::borrow(&lottery.merkle_participants);
+        (*&commitment.root, commitment.leaf_count)
+    }
+
+
+    #[view]
+    /// Get the winning leaf indices of a Merkle-committed lottery in draw order
+    public fun get_winning_leaves(lottery_id: u64): vector<u64> acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        if (!lottery.is_completed || option::is_none(&lottery.merkle_participants)) {
+            return vector::empty<u64>()
+        };
+        smart_vector::to_vector(&option::borrow(&lottery.merkle_participants).winning_leaves)
+    }
+
+
+    #[view]
+    /// Get the random seed of a lottery's draw (empty before the draw starts)
+    /// Together with the participant order at the start of the draw, the seed determines the winners.
+    public fun get_draw_seed(lottery_id: u64): vector<u8> acquires AirdropLottery {
+        let lottery = borrow_lottery(lottery_id);
+        *&lottery.seed
+    }
+
+
+    #[view]
+    /// Get at most `limit` lotteries whose deadline is at or before `now` and that have not been drawn,
+    /// earliest deadline first, together with their creators
+    /// Merges the pending shards of the global lottery index, so the cost is one read per shard plus
+    /// O(log INDEX_SHARDS) per returned lottery, whatever the number of creators.
+    public fun get_due_lotteries(now: u64, limit: u64): (vector<u64>, vector<address>) acquires LotteryIndex {
+        let lottery_index = borrow_global<LotteryIndex>(@airdrop_lottery_addr);
+        let lottery_ids = vector::empty<u64>();
+        let creators = vector::empty<address>();
+        
+        // Start from the earliest pending lottery of each shard
+        let heads = new_shard_heads<DeadlineKey>(false);
+        let shard_id = 0;
+        while (shard_id < INDEX_SHARDS) {
+            let shard = table::borrow(&lottery_index.pending, shard_id);
+            if (!big_ordered_map::is_empty(shard)) {
+                let (key, _) = big_ordered_map::borrow_front(shard);
+                push_head(&mut heads, key, shard_id);
+            };
+            shard_id = shard_id + 1;
+        };
+        
+        // Take the earliest head each time until it is not due yet, and advance its shard
+        while (!vector::is_empty(&heads.keys) && vector::length(&lottery_ids) < limit) {
+            let (key, shard_id) = pop_head(&mut heads);
+            if (key.deadline > now) {
+                break
+            };
+            let shard = table::borrow(&lottery_index.pending, shard_id);
+            vector::push_back(&mut lottery_ids, key.lottery_id);
+            vector::push_back(&mut creators, *big_ordered_map::borrow(shard, &key));
+            let next = big_ordered_map::next_key(shard, &key);
+            if (option::is_some(&next)) {
+                push_head(&mut heads, option::extract(&mut next), shard_id);
+            };
+        };
+        (lottery_ids, creators)
+    }
+
+
+    #[view]
+    public fun get_account_lotteries(account_address: address): vector<u64> acquires AccountLotteries {
+        if (!exists<AccountLotteries>(account_address)) {
+            return vector::empty<u64>()
+        };
+        
+        let account_lotteries = borrow_global<AccountLotteries>(account_address);
+        let lotteries = vector::empty<u64>();
+        append_keys(&account_lotteries.created_lotteries, &mut lotteries);
+        lotteries
+    }
+
+
+    #[view]
+    public fun get_all_lotteries(): vector<u64> acquires AccountLotteries, ModuleData {
+        let module_data = borrow_global<ModuleData>(@airdrop_lottery_addr);
+        let lotteries = vector::empty<u64>();
+        
+        // Collect the lotteries of every creator in creator order, which is ascending ID order
+        let i = 0;
+        let creators_count = smart_vector::length(&module_data.creators);
+        while (i < creators_count) {
+            let creator = *smart_vector::borrow(&module_data.creators, i);
+            let account_lotteries = borrow_global<AccountLotteries>(creator);
+            append_keys(&account_lotteries.created_lotteries, &mut lotteries);
+            i = i + 1;
+        };
+        
+        lotteries
+    }
+
+    #[view]
+    /// Get a page of at most `limit` lotteries created by an account
+    /// Any and completed lotteries are listed newest first; open and drawable lotteries are listed from
+    /// the latest deadline down. `cursor` is the cursor returned with the previous page (0 for the first
+    /// page) and `status` is one of the STATUS_* filters. Returns the page and the cursor of the next page
+    /// (0 when done). The cursor of an any or completed listing is the last lottery ID of the page; for
+    /// open and drawable listings it also holds that lottery's deadline in its high 64 bits, so paging does
+    /// not depend on the lottery still existing or keeping its deadline.
+    public fun get_account_lotteries_page(account_address: address, cursor: u128, limit: u64, status: u8): (vector<u64>, u128) acquires AccountLotteries {
+        assert!(status <= STATUS_COMPLETED, error::invalid_argument(E_INVALID_STATUS));
+        let page = vector::empty<u64>();
+        let last = 0;
+        if (exists<AccountLotteries>(account_address)) {
+            let account_lotteries = borrow_global<AccountLotteries>(account_address);
+            last = collect_lotteries(account_lotteries, cursor, limit, status, &mut page);
+        };
+        let next_cursor = next_page_cursor(&page, limit, last);
+        (page, next_cursor)
+    }
+
+
+    #[view]
+    /// Get a page of at most `limit` lotteries of all creators
+    /// Any and completed lotteries are listed by descending ID, which groups them by creator from the most
+    /// recently registered one; open and drawable lotteries are listed from the latest deadline down across
+    /// all creators. Filtered listings merge the shards of the global lottery index, so their cost does not
+    /// depend on the number of creators. Takes the same `cursor` and `status` arguments as
+    /// `get_account_lotteries_page`.
+    public fun get_lotteries_page(cursor: u128, limit: u64, status: u8): (vector<u64>, u128) acquires AccountLotteries, LotteryIndex, ModuleData {
+        assert!(status <= STATUS_COMPLETED, error::invalid_argument(E_INVALID_STATUS));
+        let page = vector::empty<u64>();
+        let last = 0;
+        
+        if (status == STATUS_ANY) {
+            // Every creator has lotteries, so visiting the creators from the cursor's one fills the page
+            let module_data = borrow_global<ModuleData>(@airdrop_lottery_addr);
+            let creator_index = if (cursor == 0) {
+                smart_vector::length(&module_data.creators)
+            } else {
+                ((cursor as u64) >> SEQUENCE_BITS) + 1
+            };
+            let creator_cursor = cursor;
+            while (creator_index > 0 && vector::length(&page) < limit) {
+                creator_index = creator_index - 1;
+                let creator = *smart_vector::borrow(&module_data.creators, creator_index);
+                let creator_last = collect_lotteries(borrow_global<AccountLotteries>(creator), creator_cursor, limit, status, &mut page);
+                if (creator_last != 0) {
+                    last = creator_last;
+                };
+                creator_cursor = 0;
+            };
+        } else if (status == STATUS_COMPLETED) {
+            last = collect_completed_shards(borrow_global<LotteryIndex>(@airdrop_lottery_addr), cursor, limit, &mut page);
+        } else {
+            last = collect_pending_shards(borrow_global<LotteryIndex>(@airdrop_lottery_addr), cursor, limit, status, &mut page);
+        };
+        
+        let next_cursor = next_page_cursor(&page, limit, last);
+        (page, next_cursor)
+    }
+
+    /// Append the account's lotteries after `cursor` that match `status` to the page until it holds `limit` IDs
+    /// Each status is served from an index in listing order, so every lottery visited goes into the page:
+    /// all and completed lotteries by descending ID, open and drawable lotteries by descending deadline
+    /// from the pending index, where the drawable ones are those up to the current time.
+    /// Returns the cursor of the last lottery appended, or 0 if none was.
+    fun collect_lotteries(account_lotteries: &AccountLotteries, cursor: u128, limit: u64, status: u8, page: &mut vector<u64>): u128 {
+        let last = 0;
+        if (status == STATUS_ANY || status == STATUS_COMPLETED) {
+            let index = if (status == STATUS_ANY) {
+                &account_lotteries.created_lotteries
+            } else {
+                &account_lotteries.completed_lotteries
+            };
+            let key = last_key_below(index, (cursor as u64));
+            while (option::is_some(&key) && vector::length(page) < limit) {
+                let lottery_id = option::extract(&mut key);
+                vector::push_back(page, lottery_id);
+                last = (lottery_id as u128);
+                key = big_ordered_map::prev_key(index, &lottery_id);
+            };
+        } else {
+            let index = &account_lotteries.pending_lotteries;
+            let now = timestamp::now_seconds();
+            
+            // Open lotteries end where the drawable ones begin
+            let key = big_ordered_map::prev_key(index, &deadline_start(cursor, status, now));
+            while (option::is_some(&key) && vector::length(page) < limit) {
+                let current = option::extract(&mut key);
+                if (status == STATUS_OPEN && current.deadline <= now) {
+                    break
+                };
+                vector::push_back(page, current.lottery_id);
+                last = deadline_cursor(&current);
+                key = big_ordered_map::prev_key(index, &current);
+            };
+        };
+        last
+    }
+
+    /// Append the completed lotteries of all creators below `cursor` to the page until it holds `limit` IDs
+    /// Merges the completed shards of the global lottery index by descending ID. Returns the cursor of the
+    /// last lottery appended, or 0 if none was.
+    fun collect_completed_shards(lottery_index: &LotteryIndex, cursor: u128, limit: u64, page: &mut vector<u64>): u128 {
+        let last = 0;
+        let heads = new_shard_heads<u64>(true);
+        let shard_id = 0;
+        while (shard_id < INDEX_SHARDS) {
+            let key = last_key_below(table::borrow(&lottery_index.completed, shard_id), (cursor as u64));
+            if (option::is_some(&key)) {
+                push_head(&mut heads, option::extract(&mut key), shard_id);
+            };
+            shard_id = shard_id + 1;
+        };
+        
+        while (!vector::is_empty(&heads.keys) && vector::length(page) < limit) {
+            let (lottery_id, shard_id) = pop_head(&mut heads);
+            vector::push_back(page, lottery_id);
+            last = (lottery_id as u128);
+            let next = big_ordered_map::prev_key(table::borrow(&lottery_index.completed, shard_id), &lottery_id);
+            if (option::is_some(&next)) {
+                push_head(&mut heads, option::extract(&mut next), shard_id);
+            };
+        };
+        last
+    }
+
+    /// Append the open or drawable lotteries of all creators after `cursor` to the page until it holds `limit` IDs
+    /// Merges the pending shards of the global lottery index by descending deadline. Returns the cursor of
+    /// the last lottery appended, or 0 if none was.
+    fun collect_pending_shards(lottery_index: &LotteryIndex, cursor: u128, limit: u64, status: u8, page: &mut vector<u64>): u128 {
+        let last = 0;
+        let now = timestamp::now_seconds();
+        let start = deadline_start(cursor, status, now);
+        let heads = new_shard_heads<DeadlineKey>(true);
+        let shard_id = 0;
+        while (shard_id < INDEX_SHARDS) {
+            let key = big_ordered_map::prev_key(table::borrow(&lottery_index.pending, shard_id), &start);
+            if (option::is_some(&key)) {
+                push_head(&mut heads, option::extract(&mut key), shard_id);
+            };
+            shard_id = shard_id + 1;
+        };
+        
+        // Open lotteries end where the drawable ones begin
+        while (!vector::is_empty(&heads.keys) && vector::length(page) < limit) {
+            let (key, shard_id) = pop_head(&mut heads);
+            if (status == STATUS_OPEN && key.deadline <= now) {
+                break
+            };
+            vector::push_back(page, key.lottery_id);
+            last = deadline_cursor(&key);
+            let next = big_ordered_map::prev_key(table::borrow(&lottery_index.pending, shard_id), &key);
+            if (option::is_some(&next)) {
+                push_head(&mut heads, option::extract(&mut next), shard_id);
+            };
+        };
+        last
+    }
+
+    /// Get the pending index key that an open or drawable listing continues below
+    /// Drawable lotteries start below the current time and open ones at the latest deadline, unless the
+    /// cursor's key is lower.
+    fun deadline_start(cursor: u128, status: u8, now: u64): DeadlineKey {
+        let start = if (status == STATUS_DRAWABLE) {
+            DeadlineKey { deadline: now, lottery_id: MAX_U64 }
+        } else {
+            DeadlineKey { deadline: MAX_U64, lottery_id: MAX_U64 }
+        };
+        if (cursor != 0) {
+            let cursor_key = DeadlineKey {
+                deadline: ((cursor >> 64) as u64),
+                lottery_id: ((cursor & (MAX_U64 as u128)) as u64),
+            };
+            if (deadline_key_less(&cursor_key, &start)) {
+                start = cursor_key;
+            };
+        };
+        start
+    }
+
+    /// Get the page cursor of a pending index key: the deadline in the high 64 bits, the lottery ID in the low ones
+    fun deadline_cursor(key: &DeadlineKey): u128 {
+        ((key.deadline as u128) << 64) | (key.lottery_id as u128)
+    }
+
+    /// Check if a pending index key orders before another
+    fun deadline_key_less(a: &DeadlineKey, b: &DeadlineKey): bool {
+        a.deadline < b.deadline || (a.deadline == b.deadline && a.lottery_id < b.lottery_id)
+    }
+
+    /// Get the largest key of the index below `cursor` (the largest key when `cursor` is 0)
+    fun last_key_below<V: store>(index: &BigOrderedMap<u64, V>, cursor: u64): Option<u64> {
+        if (big_ordered_map::is_empty(index)) {
+            option::none<u64>()
+        } else if (cursor == 0) {
+            let (key, _) = big_ordered_map::borrow_back(index);
+            option::some(key)
+        } else {
+            big_ordered_map::prev_key(index, &cursor)
+        }
+    }
+
+    /// Append the keys of an index to `out` in ascending order
+    fun append_keys(index: &BigOrderedMap<u64, u64>, out: &mut vector<u64>) {
+        if (big_ordered_map::is_empty(index)) {
+            return
+        };
+        let (first_key, _) = big_ordered_map::borrow_front(index);
+        let key = option::some(first_key);
+        while (option::is_some(&key)) {
+            let lottery_id = option::extract(&mut key);
+            vector::push_back(out, lottery_id);
+            key = big_ordered_map::next_key(index, &lottery_id);
+        };
+    }
+
+    /// Get the cursor of the page after `page` from the cursor of its last lottery, or 0 if the listing is exhausted
+    fun next_page_cursor(page: &vector<u64>, limit: u64, last: u128): u128 {
+        let length = vector::length(page);
+        if (length > 0 && length == limit) {
+            last
+        } else {
+            0
+        }
+    }
+
+    // =====================
+    // Test code (from airdrop_lottery_tests.move)
+    // =====================
+    #[test_only]
+    const ADMIN: address = @0xABCD;
+    #[test_only]
+    const USER1: address = @0x1234;
+    #[test_only]
+    const USER2: address = @0x5678;
+    #[test_only]
+    const USER3: address = @0x9ABC;
+    #[test_only]
+    const LOTTERY_ID: u64 = 1;
+
+    #[test_only]
+    fun setup_test(aptos_framework: &signer, admin: &signer) {
+        timestamp::set_time_has_started_for_testing(aptos_framework);
+        account::create_account_for_test(signer::address_of(admin));
+        init_module_for_test(admin);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_create_lottery(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let name = string::utf8(b"Test Lottery");
+        let description = string::utf8(b"This is a test lottery");
+        let winner_count = 2;
+        let current_time = timestamp::now_seconds();
+        let deadline = current_time + 3600;
+        create_lottery(admin, name, description, winner_count, deadline);
+        let (returned_name, returned_description, returned_winner_count, participant_count, is_completed, creator, created_at, returned_deadline) = get_lottery_details(LOTTERY_ID);
+        assert!(returned_name == name, 0);
+        assert!(returned_description == description, 1);
+        assert!(returned_winner_count == winner_count, 2);
+        assert!(participant_count == 0, 3);
+        assert!(!is_completed, 4);
+        assert!(creator == signer::address_of(admin), 5);
+        assert!(created_at >= current_time, 6);
+        assert!(returned_deadline == deadline, 7);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_lottery_object_address(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"First Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(admin, string::utf8(b"Second Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        
+        // Each lottery lives in its own object
+        let first_addr = get_lottery_address(LOTTERY_ID);
+        let second_addr = get_lottery_address(LOTTERY_ID + 1);
+        assert!(first_addr != second_addr, 0);
+        assert!(exists<AirdropLottery>(first_addr), 1);
+        assert!(exists<AirdropLottery>(second_addr), 2);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
+    public fun test_lottery_ids_per_creator(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"First Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(user1, string::utf8(b"Second Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(admin, string::utf8(b"Third Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        
+        // IDs are allocated from each creator's own sequence
+        let user1_lottery_id = (1 << SEQUENCE_BITS) | 1;
+        let admin_lotteries = get_account_lotteries(signer::address_of(admin));
+        assert!(admin_lotteries == vector[LOTTERY_ID, LOTTERY_ID + 1], 0);
+        assert!(get_account_lotteries(USER1) == vector[user1_lottery_id], 1);
+        
+        let (returned_name, _, _, _, _, creator, _, _) = get_lottery_details(user1_lottery_id);
+        assert!(returned_name == string::utf8(b"Second Lottery"), 2);
+        assert!(creator == USER1, 3);
+        
+        // All lotteries are listed in ascending ID order
+        assert!(get_all_lotteries() == vector[LOTTERY_ID, LOTTERY_ID + 1, user1_lottery_id], 4);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
+    public fun test_lotteries_page(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"First Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 100);
+        create_lottery(admin, string::utf8(b"Second Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 100);
+        create_lottery(admin, string::utf8(b"Third Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(user1, string::utf8(b"Fourth Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 100);
+        let user1_lottery_id = (1 << SEQUENCE_BITS) | 1;
+        
+        // Complete the first lottery after its deadline
+        add_participant(admin, LOTTERY_ID, vector::singleton(USER1));
+        timestamp::update_global_time_for_test_secs(current_time + 101);
+        draw_winners(admin, LOTTERY_ID);
+        
+        // Account listing, newest first, across two pages
+        let (page, cursor) = get_account_lotteries_page(signer::address_of(admin), 0, 2, STATUS_ANY);
+        assert!(page == vector[LOTTERY_ID + 2, LOTTERY_ID + 1], 0);
+        assert!(cursor == ((LOTTERY_ID + 1) as u128), 1);
+        let (page, cursor) = get_account_lotteries_page(signer::address_of(admin), cursor, 2, STATUS_ANY);
+        assert!(page == vector[LOTTERY_ID], 2);
+        assert!(cursor == 0, 3);
+        
+        // Status filters
+        let (page, _) = get_account_lotteries_page(signer::address_of(admin), 0, 10, STATUS_OPEN);
+        assert!(page == vector[LOTTERY_ID + 2], 4);
+        let (page, _) = get_account_lotteries_page(signer::address_of(admin), 0, 10, STATUS_DRAWABLE);
+        assert!(page == vector[LOTTERY_ID + 1], 5);
+        let (page, _) = get_account_lotteries_page(signer::address_of(admin), 0, 10, STATUS_COMPLETED);
+        assert!(page == vector[LOTTERY_ID], 6);
+        
+        // Global listing continues from one creator to the next
+        let (page, cursor) = get_lotteries_page(0, 2, STATUS_ANY);
+        assert!(page == vector[user1_lottery_id, LOTTERY_ID + 2], 7);
+        let (page, _) = get_lotteries_page(cursor, 10, STATUS_ANY);
+        assert!(page == vector[LOTTERY_ID + 1, LOTTERY_ID], 8);
+        let (page, _) = get_lotteries_page(0, 10, STATUS_DRAWABLE);
+        assert!(page == vector[user1_lottery_id, LOTTERY_ID + 1], 9);
+        
+        // Open lotteries are listed from the latest deadline down, not by ID
+        create_lottery(admin, string::utf8(b"Fifth Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 1800);
+        let (page, cursor) = get_account_lotteries_page(signer::address_of(admin), 0, 1, STATUS_OPEN);
+        assert!(page == vector[LOTTERY_ID + 2], 10);
+        assert!(cursor == deadline_cursor(&DeadlineKey { deadline: current_time + 3600, lottery_id: LOTTERY_ID + 2 }), 14);
+        let (page, cursor) = get_account_lotteries_page(signer::address_of(admin), cursor, 1, STATUS_OPEN);
+        assert!(page == vector[LOTTERY_ID + 3], 11);
+        assert!(cursor == deadline_cursor(&DeadlineKey { deadline: current_time + 1800, lottery_id: LOTTERY_ID + 3 }), 15);
+        let (page, cursor) = get_account_lotteries_page(signer::address_of(admin), cursor, 1, STATUS_OPEN);
+        assert!(vector::is_empty(&page) && cursor == 0, 12);
+        
+        // The global listing groups lotteries by creator, so the new lottery of the first creator comes last
+        let (page, _) = get_lotteries_page(0, 10, STATUS_ANY);
+        assert!(page == vector[user1_lottery_id, LOTTERY_ID + 3, LOTTERY_ID + 2, LOTTERY_ID + 1, LOTTERY_ID], 13);
+        
+        // Filtered global listings merge the lotteries of every creator: open ones by deadline, completed ones by ID
+        create_lottery(user1, string::utf8(b"Sixth Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 2700);
+        let user1_second_id = (1 << SEQUENCE_BITS) | 2;
+        let (page, _) = get_lotteries_page(0, 10, STATUS_OPEN);
+        assert!(page == vector[LOTTERY_ID + 2, user1_second_id, LOTTERY_ID + 3], 16);
+        add_participant(user1, user1_lottery_id, vector[USER2]);
+        draw_winners(user1, user1_lottery_id);
+        let (page, cursor) = get_lotteries_page(0, 1, STATUS_COMPLETED);
+        assert!(page == vector[user1_lottery_id] && cursor == (user1_lottery_id as u128), 17);
+        let (page, cursor) = get_lotteries_page(cursor, 1, STATUS_COMPLETED);
+        assert!(page == vector[LOTTERY_ID] && cursor == (LOTTERY_ID as u128), 18);
+        let (page, cursor) = get_lotteries_page(cursor, 1, STATUS_COMPLETED);
+        assert!(vector::is_empty(&page) && cursor == 0, 19);
+        
+        // The cursor holds the deadline, so paging continues after the cursor's lottery is purged
+        let (page, cursor) = get_lotteries_page(0, 1, STATUS_OPEN);
+        assert!(page == vector[LOTTERY_ID + 2], 20);
+        delete_lottery(admin, LOTTERY_ID + 2);
+        purge_lottery(admin, LOTTERY_ID + 2, 10);
+        let (page, _) = get_lotteries_page(cursor, 10, STATUS_OPEN);
+        assert!(page == vector[user1_second_id, LOTTERY_ID + 3], 21);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678)]
+    public fun test_register_participant(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        account::create_account_for_test(signer::address_of(user1));
+        account::create_account_for_test(signer::address_of(user2));
+        let name = string::utf8(b"Test Lottery");
+        let description = string::utf8(b"This is a test lottery");
+        let winner_count = 2;
+        let current_time = timestamp::now_seconds();
+        let deadline = current_time + 3600;
+        create_lottery(admin, name, description, winner_count, deadline);
+        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user1)));
+        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user2)));
+        let participants = get_participants(LOTTERY_ID);
+        assert!(vector::length(&participants) == 2, 0);
+        assert!(*vector::borrow(&participants, 0) == signer::address_of(user1), 1);
+        assert!(*vector::borrow(&participants, 1) == signer::address_of(user2), 2);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678)]
+    public fun test_self_register(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 3, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector::singleton(USER3));
+        set_self_registration(admin, LOTTERY_ID, true);
+        register(user1, LOTTERY_ID);
+        register(user2, LOTTERY_ID);
+        
+        // Pending registrations are counted and listed after the creator-added participants
+        let (_, _, _, participant_count, _, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(participant_count == 3, 0);
+        let participants = get_participants(LOTTERY_ID);
+        assert!(vector::length(&participants) == 3, 1);
+        assert!(*vector::borrow(&participants, 0) == USER3, 2);
+        assert!(vector::contains(&participants, &USER1), 3);
+        assert!(vector::contains(&participants, &USER2), 4);
+        let (page, total) = get_participants_page(LOTTERY_ID, 1, 5);
+        assert!(vector::length(&page) == 2, 5);
+        assert!(total == 3, 6);
+        
+        // The creator can add an already registered address without duplicating it
+        add_participant(admin, LOTTERY_ID, vector::singleton(USER1));
+        assert!(vector::length(&get_participants(LOTTERY_ID)) == 3, 7);
+        
+        // The draw merges the registrations into the participant list
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        let winners = get_winners(LOTTERY_ID);
+        assert!(vector::length(&winners) == 3, 8);
+        assert!(vector::contains(&winners, &USER1), 9);
+        assert!(vector::contains(&winners, &USER2), 10);
+        assert!(vector::contains(&winners, &USER3), 11);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
+    #[expected_failure(abort_code = 524295, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_self_register_twice(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        set_self_registration(admin, LOTTERY_ID, true);
+        register(user1, LOTTERY_ID);
+        register(user1, LOTTERY_ID);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
+    #[expected_failure(abort_code = 196614, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_self_register_after_deadline(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        timestamp::update_global_time_for_test_secs(current_time + 3600);
+        set_self_registration(admin, LOTTERY_ID, true);
+        register(user1, LOTTERY_ID);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
+    #[expected_failure(abort_code = 327703, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_self_register_not_allowed(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        register(user1, LOTTERY_ID);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678)]
+    #[expected_failure(abort_code = 327703, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_self_register_after_closing(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        set_self_registration(admin, LOTTERY_ID, true);
+        register(user1, LOTTERY_ID);
+        set_self_registration(admin, LOTTERY_ID, false);
+        assert!(get_participants(LOTTERY_ID) == vector[USER1], 0);
+        register(user2, LOTTERY_ID);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678)]
+    public fun test_merge_and_remove_registrations(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        set_self_registration(admin, LOTTERY_ID, true);
+        register(user1, LOTTERY_ID);
+        register(user2, LOTTERY_ID);
+        
+        // The creator can remove a pending registration, which deletes its emptied shard
+        remove_participant(admin, LOTTERY_ID, vector::singleton(USER2));
+        assert!(get_participants(LOTTERY_ID) == vector[USER1], 0);
+        assert!(table_with_length::length(&borrow_lottery(LOTTERY_ID).registrations) == 1, 3);
+        
+        // Merged registrations keep their count
+        merge_registrations(admin, LOTTERY_ID, 10);
+        let (_, _, _, participant_count, _, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(participant_count == 1, 1);
+        assert!(get_participants(LOTTERY_ID) == vector[USER1], 2);
+        
+        // Registering and removing again leaves no shard behind
+        register(user2, LOTTERY_ID);
+        remove_participant(admin, LOTTERY_ID, vector::singleton(USER2));
+        assert!(!has_pending_registrations(borrow_lottery(LOTTERY_ID)), 4);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678, user3 = @0x9ABC)]
+    public fun test_draw_winners(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer, user3: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        account::create_account_for_test(signer::address_of(user1));
+        account::create_account_for_test(signer::address_of(user2));
+        account::create_account_for_test(signer::address_of(user3));
+        let name = string::utf8(b"Test Lottery");
+        let description = string::utf8(b"This is a test lottery");
+        let winner_count = 2;
+        let current_time = timestamp::now_seconds();
+        let deadline = current_time + 3600;
+        create_lottery(admin, name, description, winner_count, deadline);
+        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user1)));
+        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user2)));
+        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user3)));
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(is_completed, 0);
+        let winners = get_winners(LOTTERY_ID);
+        assert!(vector::length(&winners) == winner_count, 1);
+        let participants = get_participants(LOTTERY_ID);
+        let winner1 = *vector::borrow(&winners, 0);
+        let winner2 = *vector::borrow(&winners, 1);
+        let (is_participant1, _) = vector::index_of(&participants, &winner1);
+        let (is_participant2, _) = vector::index_of(&participants, &winner2);
+        assert!(is_participant1, 2);
+        assert!(is_participant2, 3);
+        assert!(winner1 != winner2, 4);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user3 = @0x9ABC)]
+    public fun test_is_participant_and_is_winner(aptos_framework: &signer, admin: &signer, user3: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 2, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector[USER1, USER2]);
+        set_self_registration(admin, LOTTERY_ID, true);
+        register(user3, LOTTERY_ID);
+        assert!(is_participant(LOTTERY_ID, USER1), 0);
+        assert!(is_participant(LOTTERY_ID, USER3), 1);
+        assert!(!is_participant(LOTTERY_ID, @0xCAFE), 2);
+        assert!(!is_winner(LOTTERY_ID, USER1), 3);
+        
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        let winners = get_winners(LOTTERY_ID);
+        assert!(is_winner(LOTTERY_ID, USER1) == vector::contains(&winners, &USER1), 4);
+        assert!(is_winner(LOTTERY_ID, USER2) == vector::contains(&winners, &USER2), 5);
+        assert!(is_winner(LOTTERY_ID, USER3) == vector::contains(&winners, &USER3), 6);
+        assert!(!is_winner(LOTTERY_ID, @0xCAFE), 7);
+        assert!(is_participant(LOTTERY_ID, USER3), 8);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_draw_winners_batch_skips_lotteries_not_due(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Due"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(admin, string::utf8(b"Not due"), string::utf8(b"This is a test lottery"), 1, current_time + 7200);
+        create_lottery(admin, string::utf8(b"Too few participants"), string::utf8(b"This is a test lottery"), 3, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector[USER1, USER2]);
+        add_participant(admin, LOTTERY_ID + 1, vector[USER1, USER2]);
+        add_participant(admin, LOTTERY_ID + 2, vector[USER1, USER2]);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners_batch(admin, vector[LOTTERY_ID, LOTTERY_ID + 1, LOTTERY_ID + 2]);
+        
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(is_completed && vector::length(&get_winners(LOTTERY_ID)) == 1, 0);
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID + 1);
+        assert!(!is_completed, 1);
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID + 2);
+        assert!(!is_completed, 2);
+        
+        // Drawn lotteries are skipped by later batches
+        timestamp::update_global_time_for_test_secs(current_time + 7201);
+        let winners = get_winners(LOTTERY_ID);
+        draw_winners_batch(admin, vector[LOTTERY_ID, LOTTERY_ID + 1]);
+        assert!(get_winners(LOTTERY_ID) == winners, 3);
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID + 1);
+        assert!(is_completed, 4);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
+    public fun test_get_due_lotteries(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Late"), string::utf8(b"This is a test lottery"), 1, current_time + 7200);
+        create_lottery(user1, string::utf8(b"Early"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(admin, string::utf8(b"Early too"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        let user1_lottery = (1 << SEQUENCE_BITS) | 1;
+        let (due, _) = get_due_lotteries(current_time + 3599, 10);
+        assert!(vector::is_empty(&due), 0);
+        
+        // Earliest deadline first, ties broken by lottery ID
+        let (due, creators) = get_due_lotteries(current_time + 7200, 10);
+        assert!(due == vector[LOTTERY_ID + 1, user1_lottery, LOTTERY_ID], 1);
+        assert!(creators == vector[@airdrop_lottery_addr, USER1, @airdrop_lottery_addr], 2);
+        let (due, _) = get_due_lotteries(current_time + 7200, 1);
+        assert!(due == vector[LOTTERY_ID + 1], 3);
+        
+        // Drawn lotteries leave the index
+        add_participant(admin, LOTTERY_ID + 1, vector[USER2]);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID + 1);
+        let (due, _) = get_due_lotteries(current_time + 3601, 10);
+        assert!(due == vector[user1_lottery], 4);
+        
+        // Lotteries spread over every shard are merged in deadline order
+        let names = vector::empty<String>();
+        let descriptions = vector::empty<String>();
+        let winner_counts = vector::empty<u64>();
+        let deadlines = vector::empty<u64>();
+        let expected = vector[user1_lottery];
+        let i = 0;
+        while (i < 2 * INDEX_SHARDS) {
+            vector::push_back(&mut names, string::utf8(b"Batch"));
+            vector::push_back(&mut descriptions, string::utf8(b"This is a test lottery"));
+            vector::push_back(&mut winner_counts, 1);
+            vector::push_back(&mut deadlines, current_time + 3602 + 2 * INDEX_SHARDS - i);
+            vector::push_back(&mut expected, LOTTERY_ID + 1 + 2 * INDEX_SHARDS - i);
+            i = i + 1;
+        };
+        create_lotteries_batch(admin, names, descriptions, winner_counts, deadlines);
+        let (due, _) = get_due_lotteries(current_time + 7199, 100);
+        assert!(due == expected, 5);
+        let (due, _) = get_due_lotteries(current_time + 7199, 3);
+        assert!(due == vector[user1_lottery, LOTTERY_ID + 1 + 2 * INDEX_SHARDS, LOTTERY_ID + 2 * INDEX_SHARDS], 6);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_add_participants_packed(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector[USER2]);
+        let packed = bcs::to_bytes(&USER1);
+        vector::append(&mut packed, bcs::to_bytes(&USER2));
+        vector::append(&mut packed, bcs::to_bytes(&USER3));
+        add_participants_packed(admin, LOTTERY_ID, packed);
+        assert!(get_participants(LOTTERY_ID) == vector[USER2, USER1, USER3], 0);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
+    public fun test_add_participant_skips_pending_and_batch_duplicates(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        
+        // Without pending registrations, duplicates within the batch are caught by the participant index
+        add_participant(admin, LOTTERY_ID, vector[USER2, USER2, USER3, USER2]);
+        assert!(get_participants(LOTTERY_ID) == vector[USER2, USER3], 0);
+        
+        // A pending self-registration is not added twice
+        set_self_registration(admin, LOTTERY_ID, true);
+        register(user1, LOTTERY_ID);
+        add_participant(admin, LOTTERY_ID, vector[USER1, USER3]);
+        let (_, _, _, participant_count, _, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(participant_count == 3, 1);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    #[expected_failure(abort_code = 65556, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_add_participants_packed_partial_address(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        let packed = bcs::to_bytes(&USER1);
+        vector::pop_back(&mut packed);
+        add_participants_packed(admin, LOTTERY_ID, packed);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_draw_all_participants(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 3, current_time + 3600);
+        let participants = vector::empty<address>();
+        vector::push_back(&mut participants, USER1);
+        vector::push_back(&mut participants, USER2);
+        vector::push_back(&mut participants, USER3);
+        add_participant(admin, LOTTERY_ID, participants);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        
+        // Every participant wins exactly once
+        let winners = get_winners(LOTTERY_ID);
+        assert!(vector::length(&winners) == 3, 0);
+        assert!(vector::contains(&winners, &USER1), 1);
+        assert!(vector::contains(&winners, &USER2), 2);
+        assert!(vector::contains(&winners, &USER3), 3);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_draw_winners_from_seed(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 2, current_time + 3600);
+        let participants = vector[USER1, USER2, USER3];
+        add_participant(admin, LOTTERY_ID, participants);
+        add_participant(admin, LOTTERY_ID + 1, participants);
+        assert!(vector::is_empty(&get_draw_seed(LOTTERY_ID)), 0);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        draw_winners(admin, LOTTERY_ID + 1);
+        
+        // Replay the partial shuffle from the published seed
+        let seed = get_draw_seed(LOTTERY_ID);
+        assert!(vector::length(&seed) == 32, 1);
+        let shuffled = participants;
+        let (j, _) = random_stream::index_in_range(&seed, 0, 0, 3);
+        vector::swap(&mut shuffled, 0, j);
+        assert!(get_winners(LOTTERY_ID) == vector[*vector::borrow(&shuffled, 0)], 2);
+        
+        // Two winners of three: the single loser is drawn into the last slot instead
+        let seed = get_draw_seed(LOTTERY_ID + 1);
+        let shuffled = participants;
+        let (j, _) = random_stream::index_in_range(&seed, 0, 0, 3);
+        vector::swap(&mut shuffled, 2, j);
+        vector::pop_back(&mut shuffled);
+        assert!(get_winners(LOTTERY_ID + 1) == shuffled, 3);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_draw_winners_lazy(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 2, current_time + 3600);
+        let participants = vector[USER1, USER2, USER3];
+        add_participant(admin, LOTTERY_ID, participants);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners_lazy(admin, LOTTERY_ID);
+        
+        // Winners are derived from the seed and nothing is stored
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(is_completed, 0);
+        assert!(smart_vector::is_empty(&borrow_lottery(LOTTERY_ID).winners), 1);
+        let seed = get_draw_seed(LOTTERY_ID);
+        let winners = get_winners(LOTTERY_ID);
+        assert!(vector::length(&winners) == 2, 2);
+        assert!(*vector::borrow(&winners, 0) == *vector::borrow(&participants, seeded_permutation::apply(&seed, 3, 0)), 3);
+        assert!(*vector::borrow(&winners, 1) == *vector::borrow(&participants, seeded_permutation::apply(&seed, 3, 1)), 4);
+        assert!(*vector::borrow(&winners, 0) != *vector::borrow(&winners, 1), 5);
+        
+        // is_winner agrees with get_winners
+        let i = 0;
+        while (i < 3) {
+            let participant = *vector::borrow(&participants, i);
+            assert!(is_winner(LOTTERY_ID, participant) == vector::contains(&winners, &participant), 6);
+            i = i + 1;
+        };
+        assert!(!is_winner(LOTTERY_ID, @0xCAFE), 7);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_draw_weighted_winners(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 2, current_time + 3600);
+        add_weighted_participants(admin, LOTTERY_ID, vector[USER1, USER2, USER3], vector[5, 1, 3]);
+        add_participant(admin, LOTTERY_ID, vector[@0xCAFE]);
+        remove_participant(admin, LOTTERY_ID, vector[USER2]);
+        assert!(get_participant_weight(LOTTERY_ID, USER1) == 5, 0);
+        assert!(get_participant_weight(LOTTERY_ID, USER3) == 3, 1);
+        assert!(get_participant_weight(LOTTERY_ID, @0xCAFE) == 1, 2);
+        assert!(get_participant_weight(LOTTERY_ID, USER2) == 0, 3);
+        
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        let winners = get_winners(LOTTERY_ID);
+        assert!(vector::length(&winners) == 2, 4);
+        assert!(*vector::borrow(&winners, 0) != *vector::borrow(&winners, 1), 5);
+        assert!(!vector::contains(&winners, &USER2), 6);
+        
+        // Weights follow their participants through the shuffle
+        assert!(get_participant_weight(LOTTERY_ID, USER1) == 5, 7);
+        assert!(get_participant_weight(LOTTERY_ID, USER3) == 3, 8);
+        assert!(get_participant_weight(LOTTERY_ID, @0xCAFE) == 1, 9);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, creator = @0x1234)]
+    public fun test_create_lotteries_batch(aptos_framework: &signer, admin: &signer, creator: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(creator, string::utf8(b"First"), string::utf8(b"Created alone"), 1, current_time + 3600);
+        create_lotteries_batch(
+            creator,
+            vector[string::utf8(b"Second"), string::utf8(b"Third")],
+            vector[string::utf8(b"Created in a batch"), string::utf8(b"Created in a batch too")],
+            vector[2, 3],
+            vector[current_time + 7200, current_time + 10800]
+        );
+        
+        // The batch continues the creator's sequence
+        let first_id = (1 << SEQUENCE_BITS) | 1;
+        assert!(get_account_lotteries(USER1) == vector[first_id, first_id + 1, first_id + 2], 0);
+        let (name, description, winner_count, _, _, creator_addr, _, deadline) = get_lottery_details(first_id + 2);
+        assert!(name == string::utf8(b"Third"), 1);
+        assert!(description == string::utf8(b"Created in a batch too"), 2);
+        assert!(winner_count == 3 && deadline == current_time + 10800 && creator_addr == USER1, 3);
+        let (page, _) = get_lotteries_page(0, 10, STATUS_OPEN);
+        assert!(vector::length(&page) == 3, 4);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
+    public fun test_delete_lottery(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Pending"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(admin, string::utf8(b"Completed"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(admin, string::utf8(b"Kept"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector[USER1, USER2]);
+        set_self_registration(admin, LOTTERY_ID + 1, true);
+        register(user1, LOTTERY_ID + 1);
+        add_weighted_participants(admin, LOTTERY_ID + 1, vector[USER2], vector[3]);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID + 1);
+        
+        delete_lottery(admin, LOTTERY_ID);
+        delete_lottery(admin, LOTTERY_ID + 1);
+        
+        // The lotteries are gone from every index
+        assert!(!lottery_exists(LOTTERY_ID) && !lottery_exists(LOTTERY_ID + 1), 0);
+        assert!(get_account_lotteries(@airdrop_lottery_addr) == vector[LOTTERY_ID + 2], 1);
+        assert!(get_all_lotteries() == vector[LOTTERY_ID + 2], 2);
+        let (page, _) = get_lotteries_page(0, 10, STATUS_ANY);
+        assert!(page == vector[LOTTERY_ID + 2], 3);
+        let (page, _) = get_lotteries_page(0, 10, STATUS_COMPLETED);
+        assert!(vector::is_empty(&page), 4);
+        let (due, _) = get_due_lotteries(current_time + 3601, 10);
+        assert!(due == vector[LOTTERY_ID + 2], 5);
+        
+        // Their storage is freed in batches, and the last batch removes the lottery itself
+        purge_lottery(admin, LOTTERY_ID, 1);
+        assert!(exists<AirdropLottery>(lottery_address(LOTTERY_ID)), 6);
+        purge_lottery(admin, LOTTERY_ID, 2);
+        assert!(!exists<AirdropLottery>(lottery_address(LOTTERY_ID)), 7);
+        purge_lottery(admin, LOTTERY_ID + 1, 10);
+        assert!(!exists<AirdropLottery>(lottery_address(LOTTERY_ID + 1)), 8);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    #[expected_failure(abort_code = 393218, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_get_deleted_lottery(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        delete_lottery(admin, LOTTERY_ID);
+        get_lottery_details(LOTTERY_ID);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    #[expected_failure(abort_code = 196630, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_purge_lottery_not_deleted(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        purge_lottery(admin, LOTTERY_ID, 10);
+    }
 
-    #[randomness]
-    entry fun draw_winners(
-        account: &signer,
-        lottery_id: u64
-    ) acquires ModuleData {
-        let account_addr = signer::address_of(account);
-        
-        // Get module data and check if lottery exists
-        let module_data = borrow_global_mut<ModuleData>(@airdrop_lottery_addr);
-        assert!(smart_table::contains(&module_data.lotteries_table, lottery_id), error::not_found(E_LOTTERY_NOT_FOUND));
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_update_deadline(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        update_deadline(admin, LOTTERY_ID, current_time + 60);
         
-        let lottery = smart_table::borrow_mut(&mut module_data.lotteries_table, lottery_id);
+        let (_, _, _, _, _, _, _, deadline) = get_lottery_details(LOTTERY_ID);
+        assert!(deadline == current_time + 60, 0);
+        let (due, _) = get_due_lotteries(current_time + 60, 10);
+        assert!(due == vector[LOTTERY_ID], 1);
+        timestamp::update_global_time_for_test_secs(current_time + 60);
+        let (page, _) = get_lotteries_page(0, 10, STATUS_DRAWABLE);
+        assert!(page == vector[LOTTERY_ID], 2);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_get_lottery_details_batch(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"First"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        create_lottery(admin, string::utf8(b"Second"), string::utf8(b"This is a test lottery"), 2, current_time + 7200);
+        add_participant(admin, LOTTERY_ID + 1, vector[USER1, USER2]);
         
-        // Only the creator can execute
-        assert!(account_addr == lottery.creator, error::permission_denied(E_NOT_AUTHORIZED));
+        let summaries = get_lottery_details_batch(vector[LOTTERY_ID + 1, LOTTERY_ID], true);
+        assert!(vector::length(&summaries) == 2, 0);
+        let second = vector::borrow(&summaries, 0);
+        assert!(summary_lottery_id(second) == LOTTERY_ID + 1 && summary_name(second) == string::utf8(b"Second"), 1);
+        assert!(summary_participant_count(second) == 2 && summary_winner_count(second) == 2, 2);
+        assert!(summary_deadline(second) == current_time + 7200 && !summary_is_completed(second), 7);
+        assert!(summary_created_at(second) == current_time, 8);
+        assert!(summary_lottery_id(vector::borrow(&summaries, 1)) == LOTTERY_ID, 3);
         
-        // Check if the lottery is not completed
-        assert!(!lottery.is_completed, error::invalid_state(E_LOTTERY_ALREADY_COMPLETED));
+        // Text fields are left out on request
+        let summaries = get_lottery_details_batch(vector[LOTTERY_ID + 1], false);
+        let second = vector::borrow(&summaries, 0);
+        assert!(string::is_empty(&summary_name(second)) && string::is_empty(&summary_description(second)), 4);
+        assert!(summary_participant_count(second) == 2 && summary_creator(second) == @airdrop_lottery_addr, 5);
         
-        // Check if the deadline has been reached
-        assert!(timestamp::now_seconds() >= lottery.deadline, error::invalid_state(E_DEADLINE_NOT_REACHED));
+        // Deleted and unknown lotteries are skipped
+        delete_lottery(admin, LOTTERY_ID);
+        let summaries = get_lottery_details_batch(vector[LOTTERY_ID, LOTTERY_ID + 1, LOTTERY_ID + 5], false);
+        assert!(vector::length(&summaries) == 1 && summary_lottery_id(vector::borrow(&summaries, 0)) == LOTTERY_ID + 1, 6);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    #[expected_failure(abort_code = 65554, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_create_lotteries_batch_length_mismatch(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        create_lotteries_batch(admin, vector[string::utf8(b"Only")], vector[], vector[1], vector[0]);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user3 = @0x9ABC)]
+    public fun test_ticket_ranges(aptos_framework: &signer, admin: &signer, user3: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        set_self_registration(admin, LOTTERY_ID, true);
+        register(user3, LOTTERY_ID);
+        add_tickets(admin, LOTTERY_ID, vector[USER1, USER2], vector[1000, 2]);
+        add_tickets(admin, LOTTERY_ID, vector[USER1, USER3], vector[500, 4]);
         
-        // Check if the number of participants is at least the number of winners
-        let participant_count = smart_vector::length(&lottery.participants);
-        assert!(participant_count >= lottery.winner_count, error::invalid_argument(E_INSUFFICIENT_PARTICIPANTS));
+        // Each participant is stored once with its cumulative ticket range
+        let (_, _, _, participant_count, _, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(participant_count == 3, 0);
+        let (start, end) = get_ticket_range(LOTTERY_ID, USER1);
+        assert!(start == 0 && end == 1500, 1);
+        let (start, end) = get_ticket_range(LOTTERY_ID, USER2);
+        assert!(start == 1500 && end == 1502, 2);
+        let (start, end) = get_ticket_range(LOTTERY_ID, USER3);
+        assert!(start == 1502 && end == 1507, 3);
         
-        // Select winners
-        let participants_vec = smart_vector::to_vector(&lottery.participants);
-        let winners_vec = shuffle_and_select(&participants_vec, lottery.winner_count);
+        let (owner, total_tickets) = get_ticket_owner(LOTTERY_ID, 1499);
+        assert!(owner == USER1 && total_tickets == 1507, 4);
+        let (owner, _) = get_ticket_owner(LOTTERY_ID, 1500);
+        assert!(owner == USER2, 5);
+        let (owner, _) = get_ticket_owner(LOTTERY_ID, 1506);
+        assert!(owner == USER3, 6);
+        let (owner, _) = get_ticket_owner(LOTTERY_ID, 1507);
+        assert!(owner == @0x0, 7);
+    }
+
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_archive_lottery(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector[USER1, USER2, USER3]);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        let participants = get_participants(LOTTERY_ID);
+        let winners = get_winners(LOTTERY_ID);
         
-        // Add winners to SmartVector one by one
-        let i = 0;
-        let winners_count = vector::length(&winners_vec);
-        while (i < winners_count) {
-            let winner = *vector::borrow(&winners_vec, i);
-            smart_vector::push_back(&mut lottery.winners, winner);
-            i = i + 1;
-        };
-        lottery.is_completed = true;
+        // Archive in two batches
+        archive_lottery(admin, LOTTERY_ID, 2);
+        let (root, _) = get_participants_root(LOTTERY_ID);
+        assert!(vector::is_empty(&root), 0);
+        archive_lottery(admin, LOTTERY_ID, 2);
         
-        // Emit event
-        event::emit(
-            LotteryCompletionEvent {
-                lottery_id,
-                winners: smart_vector::to_vector(&lottery.winners),
-            },
+        // Only the winner is still stored, and the root commits to the list in reverse order
+        let (root, participant_count) = get_participants_root(LOTTERY_ID);
+        let (expected_root, _) = merkle_proof::three_leaf_tree(
+            *vector::borrow(&participants, 2),
+            *vector::borrow(&participants, 1),
+            *vector::borrow(&participants, 0)
         );
+        assert!(root == expected_root && participant_count == 3, 1);
+        assert!(get_participants(LOTTERY_ID) == winners, 2);
+        let (_, _, _, participant_count, _, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(participant_count == 3, 3);
+        assert!(get_winners(LOTTERY_ID) == winners, 4);
+        assert!(is_winner(LOTTERY_ID, *vector::borrow(&winners, 0)), 5);
+        assert!(!is_winner(LOTTERY_ID, *vector::borrow(&participants, 2)), 6);
+        
+        // The participant views only list what is still stored
+        let (page, total) = get_participants_page(LOTTERY_ID, 0, 10);
+        assert!(page == winners && total == 1, 7);
+        assert!(is_participant(LOTTERY_ID, *vector::borrow(&winners, 0)), 8);
+        assert!(!is_participant(LOTTERY_ID, *vector::borrow(&participants, 2)), 9);
     }
 
-    /// Shuffle the participant list and select the specified number of winners
-    fun shuffle_and_select(participants: &vector<address>, count: u64): vector<address> {
-        let total = vector::length(participants);
-        assert!(count <= total, error::invalid_argument(E_INSUFFICIENT_PARTICIPANTS));
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678)]
+    public fun test_merkle_lottery_claim(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 3, current_time + 3600);
+        let (root, proofs) = merkle_proof::three_leaf_tree(USER1, USER2, USER3);
+        commit_participants_root(admin, LOTTERY_ID, root, 3);
+        let (_, _, _, participant_count, _, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(participant_count == 3, 0);
         
-        let winners = vector::empty<address>();
-        let participants_copy = *participants;
+        // Every leaf wins when all participants are winners
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        let winning_leaves = get_winning_leaves(LOTTERY_ID);
+        assert!(vector::length(&winning_leaves) == 3, 1);
+        assert!(vector::contains(&winning_leaves, &0), 2);
+        assert!(vector::contains(&winning_leaves, &1), 3);
+        assert!(vector::contains(&winning_leaves, &2), 4);
         
-        let i = 0;
-        while (i < count) {
-            let rand_index = randomness::u64_range(0, vector::length(&participants_copy));
-            let winner = vector::remove(&mut participants_copy, rand_index);
-            vector::push_back(&mut winners, winner);
-            i = i + 1;
-        };
+        // Winners are recorded as they claim
+        assert!(vector::is_empty(&get_winners(LOTTERY_ID)), 5);
+        claim_win(user2, LOTTERY_ID, 1, *vector::borrow(&proofs, 1));
+        claim_win(user1, LOTTERY_ID, 0, *vector::borrow(&proofs, 0));
+        assert!(get_winners(LOTTERY_ID) == vector[USER2, USER1], 6);
+        assert!(is_winner(LOTTERY_ID, USER1) && is_winner(LOTTERY_ID, USER2), 7);
+        assert!(!is_winner(LOTTERY_ID, USER3), 8);
         
-        winners
+        // Purging replays the draw to free the recorded swaps
+        delete_lottery(admin, LOTTERY_ID);
+        purge_lottery(admin, LOTTERY_ID, 2);
+        assert!(exists<AirdropLottery>(lottery_address(LOTTERY_ID)), 9);
+        purge_lottery(admin, LOTTERY_ID, 10);
+        assert!(!exists<AirdropLottery>(lottery_address(LOTTERY_ID)), 10);
     }
 
-
-    #[view]
-    public fun get_lottery_details(lottery_id: u64): (String, String, u64, u64, bool, address, u64, u64) acquires ModuleData {
-        let module_data = borrow_global<ModuleData>(@airdrop_lottery_addr);
-        assert!(smart_table::contains(&module_data.lotteries_table, lottery_id), error::not_found(E_LOTTERY_NOT_FOUND));
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678)]
+    public fun test_purge_merkle_lottery_with_repeated_claimant(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 3, current_time + 3600);
+        let (root, proofs) = merkle_proof::three_leaf_tree(USER1, USER1, USER2);
+        commit_participants_root(admin, LOTTERY_ID, root, 3);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
         
-        let lottery = smart_table::borrow(&module_data.lotteries_table, lottery_id);
+        // The address listed in two leaves claims both
+        claim_win(user1, LOTTERY_ID, 0, *vector::borrow(&proofs, 0));
+        claim_win(user1, LOTTERY_ID, 1, *vector::borrow(&proofs, 1));
+        claim_win(user2, LOTTERY_ID, 2, *vector::borrow(&proofs, 2));
+        assert!(get_winners(LOTTERY_ID) == vector[USER1, USER1, USER2], 0);
         
-        (
-            *&lottery.name,
-            *&lottery.description,
-            lottery.winner_count,
-            smart_vector::length(&lottery.participants),
-            lottery.is_completed,
-            lottery.creator,
-            lottery.created_at,
-            lottery.deadline
-        )
+        // Purging frees its single claimant entry once
+        delete_lottery(admin, LOTTERY_ID);
+        purge_lottery(admin, LOTTERY_ID, 100);
+        assert!(!exists<AirdropLottery>(lottery_address(LOTTERY_ID)), 1);
     }
 
-
-    #[view]
-    public fun get_participants(lottery_id: u64): vector<address> acquires ModuleData {
-        let module_data = borrow_global<ModuleData>(@airdrop_lottery_addr);
-        assert!(smart_table::contains(&module_data.lotteries_table, lottery_id), error::not_found(E_LOTTERY_NOT_FOUND));
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
+    #[expected_failure(abort_code = 65552, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_merkle_claim_with_wrong_proof(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 3, current_time + 3600);
+        let (root, proofs) = merkle_proof::three_leaf_tree(USER1, USER2, USER3);
+        commit_participants_root(admin, LOTTERY_ID, root, 3);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
         
-        let lottery = smart_table::borrow(&module_data.lotteries_table, lottery_id);
-        smart_vector::to_vector(&lottery.participants)
+        // USER1 is leaf 0, not leaf 1
+        claim_win(user1, LOTTERY_ID, 1, *vector::borrow(&proofs, 1));
     }
 
-
-    #[view]
-    public fun get_winners(lottery_id: u64): vector<address> acquires ModuleData {
-        let module_data = borrow_global<ModuleData>(@airdrop_lottery_addr);
-        assert!(smart_table::contains(&module_data.lotteries_table, lottery_id), error::not_found(E_LOTTERY_NOT_FOUND));
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_draw_winners_in_chunks(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 3, current_time + 3600);
+        let participants = vector::empty<address>();
+        vector::push_back(&mut participants, USER1);
+        vector::push_back(&mut participants, USER2);
+        vector::push_back(&mut participants, USER3);
+        add_participant(admin, LOTTERY_ID, participants);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
         
-        let lottery = smart_table::borrow(&module_data.lotteries_table, lottery_id);
-        if (lottery.is_completed) {
-            smart_vector::to_vector(&lottery.winners)
-        } else {
-            vector::empty<address>()
-        }
-    }
-
-
-    #[view]
-    public fun get_account_lotteries(account_address: address): vector<u64> acquires AccountLotteries {
-        if (!exists<AccountLotteries>(account_address)) {
-            return vector::empty<u64>()
-        };
+        // The first chunk does not complete the lottery
+        draw_winners_chunk(admin, LOTTERY_ID, 2);
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(!is_completed, 0);
+        assert!(vector::length(&get_winners(LOTTERY_ID)) == 0, 1);
         
-        let account_lotteries = borrow_global<AccountLotteries>(account_address);
-        *&account_lotteries.created_lotteries
-    }
-
-
-    #[view]
-    public fun get_all_lotteries(): vector<u64> acquires ModuleData {
-        let module_data = borrow_global<ModuleData>(@airdrop_lottery_addr);
-        *&module_data.lotteries
+        // The final chunk selects the remaining winner
+        draw_winners_chunk(admin, LOTTERY_ID, 2);
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID);
+        assert!(is_completed, 2);
+        let winners = get_winners(LOTTERY_ID);
+        assert!(vector::length(&winners) == 3, 3);
+        assert!(vector::contains(&winners, &USER1), 4);
+        assert!(vector::contains(&winners, &USER2), 5);
+        assert!(vector::contains(&winners, &USER3), 6);
     }
 
-    // =====================
-    // Test code (from airdrop_lottery_tests.move)
-    // =====================
-    #[test_only]
-    const ADMIN: address = @0xABCD;
-    #[test_only]
-    const USER1: address = @0x1234;
-    #[test_only]
-    const USER2: address = @0x5678;
-    #[test_only]
-    const USER3: address = @0x9ABC;
-    #[test_only]
-    const LOTTERY_ID: u64 = 1;
-
-    #[test_only]
-    fun setup_test(aptos_framework: &signer, admin: &signer) {
-        timestamp::set_time_has_started_for_testing(aptos_framework);
-        account::create_account_for_test(signer::address_of(admin));
-        init_module_for_test(admin);
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_promote_backup(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery_with_backups(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, 2, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector[USER1, USER2, USER3]);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        
+        // Every participant is either the winner or on the waitlist
+        let winner = *vector::borrow(&get_winners(LOTTERY_ID), 0);
+        let backups = get_backups(LOTTERY_ID);
+        assert!(vector::length(&backups) == 2, 0);
+        assert!(!vector::contains(&backups, &winner), 1);
+        
+        // The first backup replaces the disqualified winner
+        let first_backup = *vector::borrow(&backups, 0);
+        promote_backup(admin, LOTTERY_ID, winner);
+        assert!(get_winners(LOTTERY_ID) == vector[first_backup], 2);
+        assert!(get_backups(LOTTERY_ID) == vector[*vector::borrow(&backups, 1)], 3);
+        assert!(is_winner(LOTTERY_ID, first_backup), 4);
+        assert!(!is_winner(LOTTERY_ID, winner), 5);
+        
+        // A promoted backup can be replaced in turn
+        promote_backup(admin, LOTTERY_ID, first_backup);
+        assert!(get_winners(LOTTERY_ID) == vector[*vector::borrow(&backups, 1)], 6);
+        assert!(vector::is_empty(&get_backups(LOTTERY_ID)), 7);
     }
 
+    #[lint::allow_unsafe_randomness]
     #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
-    public fun test_create_lottery(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, ModuleData {
+    public fun test_short_waitlist(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
         setup_test(aptos_framework, admin);
-        let name = string::utf8(b"Test Lottery");
-        let description = string::utf8(b"This is a test lottery");
-        let winner_count = 2;
         let current_time = timestamp::now_seconds();
-        let deadline = current_time + 3600;
-        create_lottery(admin, name, description, winner_count, deadline);
-        let (returned_name, returned_description, returned_winner_count, participant_count, is_completed, creator, created_at, returned_deadline) = get_lottery_details(LOTTERY_ID);
-        assert!(returned_name == name, 0);
-        assert!(returned_description == description, 1);
-        assert!(returned_winner_count == winner_count, 2);
-        assert!(participant_count == 0, 3);
-        assert!(!is_completed, 4);
-        assert!(creator == signer::address_of(admin), 5);
-        assert!(created_at >= current_time, 6);
-        assert!(returned_deadline == deadline, 7);
+        create_lottery_with_backups(admin, string::utf8(b"Single"), string::utf8(b"This is a test lottery"), 1, 3, current_time + 3600);
+        create_lottery_with_backups(admin, string::utf8(b"Chunked"), string::utf8(b"This is a test lottery"), 1, 3, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector[USER1, USER2]);
+        add_participant(admin, LOTTERY_ID + 1, vector[USER1, USER2]);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        
+        // Only the one participant left after the winner is drawn as a backup
+        draw_winners(admin, LOTTERY_ID);
+        let winner = *vector::borrow(&get_winners(LOTTERY_ID), 0);
+        let backups = get_backups(LOTTERY_ID);
+        assert!(vector::length(&backups) == 1 && !vector::contains(&backups, &winner), 0);
+        promote_backup(admin, LOTTERY_ID, winner);
+        assert!(get_winners(LOTTERY_ID) == backups, 1);
+        assert!(vector::is_empty(&get_backups(LOTTERY_ID)), 2);
+        
+        // A chunked draw completes once the shortened waitlist is drawn
+        draw_winners_chunk(admin, LOTTERY_ID + 1, 1);
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID + 1);
+        assert!(!is_completed, 3);
+        draw_winners_chunk(admin, LOTTERY_ID + 1, 10);
+        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID + 1);
+        assert!(is_completed, 4);
+        assert!(vector::length(&get_backups(LOTTERY_ID + 1)) == 1, 5);
     }
 
-    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678)]
-    public fun test_register_participant(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer) acquires AccountLotteries, ModuleData {
+    #[lint::allow_unsafe_randomness]
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    #[expected_failure(abort_code = 196629, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_promote_backup_without_backups(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        randomness::initialize_for_testing(aptos_framework);
         setup_test(aptos_framework, admin);
-        account::create_account_for_test(signer::address_of(user1));
-        account::create_account_for_test(signer::address_of(user2));
-        let name = string::utf8(b"Test Lottery");
-        let description = string::utf8(b"This is a test lottery");
-        let winner_count = 2;
         let current_time = timestamp::now_seconds();
-        let deadline = current_time + 3600;
-        create_lottery(admin, name, description, winner_count, deadline);
-        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user1)));
-        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user2)));
-        let participants = get_participants(LOTTERY_ID);
-        assert!(vector::length(&participants) == 2, 0);
-        assert!(*vector::borrow(&participants, 0) == signer::address_of(user1), 1);
-        assert!(*vector::borrow(&participants, 1) == signer::address_of(user2), 2);
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector[USER1, USER2]);
+        timestamp::update_global_time_for_test_secs(current_time + 3601);
+        draw_winners(admin, LOTTERY_ID);
+        promote_backup(admin, LOTTERY_ID, *vector::borrow(&get_winners(LOTTERY_ID), 0));
     }
 
     #[lint::allow_unsafe_randomness]
-    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678, user3 = @0x9ABC)]
-    public fun test_draw_winners(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer, user3: &signer) acquires AccountLotteries, ModuleData {
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    #[expected_failure(abort_code = 196618, location = airdrop_lottery_addr::airdrop_lottery)]
+    public fun test_add_participant_during_chunked_draw(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
         randomness::initialize_for_testing(aptos_framework);
         setup_test(aptos_framework, admin);
-        account::create_account_for_test(signer::address_of(user1));
-        account::create_account_for_test(signer::address_of(user2));
-        account::create_account_for_test(signer::address_of(user3));
-        let name = string::utf8(b"Test Lottery");
-        let description = string::utf8(b"This is a test lottery");
-        let winner_count = 2;
         let current_time = timestamp::now_seconds();
-        let deadline = current_time + 3600;
-        create_lottery(admin, name, description, winner_count, deadline);
-        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user1)));
-        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user2)));
-        add_participant(admin, LOTTERY_ID, vector::singleton(signer::address_of(user3)));
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 2, current_time + 3600);
+        let participants = vector::empty<address>();
+        vector::push_back(&mut participants, USER1);
+        vector::push_back(&mut participants, USER2);
+        add_participant(admin, LOTTERY_ID, participants);
         timestamp::update_global_time_for_test_secs(current_time + 3601);
-        draw_winners(admin, LOTTERY_ID);
-        let (_, _, _, _, is_completed, _, _, _) = get_lottery_details(LOTTERY_ID);
-        assert!(is_completed, 0);
-        let winners = get_winners(LOTTERY_ID);
-        assert!(vector::length(&winners) == winner_count, 1);
-        let participants = get_participants(LOTTERY_ID);
-        let winner1 = *vector::borrow(&winners, 0);
-        let winner2 = *vector::borrow(&winners, 1);
-        let (is_participant1, _) = vector::index_of(&participants, &winner1);
-        let (is_participant2, _) = vector::index_of(&participants, &winner2);
-        assert!(is_participant1, 2);
-        assert!(is_participant2, 3);
-        assert!(winner1 != winner2, 4);
+        draw_winners_chunk(admin, LOTTERY_ID, 1);
+        add_participant(admin, LOTTERY_ID, vector::singleton(USER3));
     }
 
     #[lint::allow_unsafe_randomness]
     #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
     #[expected_failure(abort_code = 196613, location = airdrop_lottery_addr::airdrop_lottery)]
-    public fun test_draw_winners_before_deadline(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, ModuleData {
+    public fun test_draw_winners_before_deadline(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
         randomness::initialize_for_testing(aptos_framework);
         setup_test(aptos_framework, admin);
         account::create_account_for_test(signer::address_of(user1));
@@ -466,7 +3588,7 @@ module airdrop_lottery_addr::airdrop_lottery {
     #[lint::allow_unsafe_randomness]
     #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
     #[expected_failure(abort_code = 65545, location = airdrop_lottery_addr::airdrop_lottery)]
-    public fun test_insufficient_participants(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, ModuleData {
+    public fun test_insufficient_participants(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
         randomness::initialize_for_testing(aptos_framework);
         setup_test(aptos_framework, admin);
         account::create_account_for_test(signer::address_of(user1));
@@ -484,7 +3606,7 @@ module airdrop_lottery_addr::airdrop_lottery {
     #[lint::allow_unsafe_randomness]
     #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678)]
     #[expected_failure(abort_code = 327681, location = airdrop_lottery_addr::airdrop_lottery)]
-    public fun test_unauthorized_draw(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer) acquires AccountLotteries, ModuleData {
+    public fun test_unauthorized_draw(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
         randomness::initialize_for_testing(aptos_framework);
         setup_test(aptos_framework, admin);
         account::create_account_for_test(signer::address_of(user1));
@@ -501,7 +3623,7 @@ module airdrop_lottery_addr::airdrop_lottery {
     }
 
     #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678, user3 = @0x9ABC)]
-    public fun test_add_multiple_participants(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer, user3: &signer) acquires AccountLotteries, ModuleData {
+    public fun test_add_multiple_participants(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer, user3: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
         setup_test(aptos_framework, admin);
         account::create_account_for_test(signer::address_of(user1));
         account::create_account_for_test(signer::address_of(user2));
@@ -530,8 +3652,51 @@ module airdrop_lottery_addr::airdrop_lottery {
         assert!(*vector::borrow(&registered_participants, 2) == signer::address_of(user3), 3);
     }
 
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_get_participants_page(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        add_participant(admin, LOTTERY_ID, vector[USER1, USER2, USER3]);
+        
+        let (page, total) = get_participants_page(LOTTERY_ID, 0, 2);
+        assert!(page == vector[USER1, USER2], 0);
+        assert!(total == 3, 1);
+        
+        // The last page is truncated to the remaining participants
+        let (page, _) = get_participants_page(LOTTERY_ID, 2, 2);
+        assert!(page == vector[USER3], 2);
+        
+        // Pages past the end are empty
+        let (page, total) = get_participants_page(LOTTERY_ID, 5, 2);
+        assert!(vector::is_empty(&page), 3);
+        assert!(total == 3, 4);
+    }
+
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_add_duplicate_participants(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        
+        // Duplicates inside one batch and across batches are ignored
+        let participants = vector::empty<address>();
+        vector::push_back(&mut participants, USER1);
+        vector::push_back(&mut participants, USER2);
+        vector::push_back(&mut participants, USER1);
+        add_participant(admin, LOTTERY_ID, participants);
+        add_participant(admin, LOTTERY_ID, vector::singleton(USER2));
+        add_participant(admin, LOTTERY_ID, vector::singleton(USER3));
+        
+        let registered_participants = get_participants(LOTTERY_ID);
+        assert!(vector::length(&registered_participants) == 3, 0);
+        assert!(*vector::borrow(&registered_participants, 0) == USER1, 1);
+        assert!(*vector::borrow(&registered_participants, 1) == USER2, 2);
+        assert!(*vector::borrow(&registered_participants, 2) == USER3, 3);
+    }
+
     #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234, user2 = @0x5678, user3 = @0x9ABC)]
-    public fun test_remove_multiple_participants(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer, user3: &signer) acquires AccountLotteries, ModuleData {
+    public fun test_remove_multiple_participants(aptos_framework: &signer, admin: &signer, user1: &signer, user2: &signer, user3: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
         setup_test(aptos_framework, admin);
         account::create_account_for_test(signer::address_of(user1));
         account::create_account_for_test(signer::address_of(user2));
@@ -566,8 +3731,35 @@ module airdrop_lottery_addr::airdrop_lottery {
         assert!(*vector::borrow(&remaining_participants, 0) == signer::address_of(user2), 2);
     }
 
+    #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr)]
+    public fun test_remove_participant_keeps_index(aptos_framework: &signer, admin: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
+        setup_test(aptos_framework, admin);
+        let current_time = timestamp::now_seconds();
+        create_lottery(admin, string::utf8(b"Test Lottery"), string::utf8(b"This is a test lottery"), 1, current_time + 3600);
+        let participants = vector::empty<address>();
+        vector::push_back(&mut participants, USER1);
+        vector::push_back(&mut participants, USER2);
+        vector::push_back(&mut participants, USER3);
+        add_participant(admin, LOTTERY_ID, participants);
+        
+        // Removing the first participant moves the last one into its slot
+        remove_participant(admin, LOTTERY_ID, vector::singleton(USER1));
+        let remaining_participants = get_participants(LOTTERY_ID);
+        assert!(vector::length(&remaining_participants) == 2, 0);
+        assert!(*vector::borrow(&remaining_participants, 0) == USER3, 1);
+        assert!(*vector::borrow(&remaining_participants, 1) == USER2, 2);
+        
+        // The moved participant can still be removed and re-added through the index
+        remove_participant(admin, LOTTERY_ID, vector::singleton(USER3));
+        add_participant(admin, LOTTERY_ID, vector::singleton(USER1));
+        let remaining_participants = get_participants(LOTTERY_ID);
+        assert!(vector::length(&remaining_participants) == 2, 3);
+        assert!(*vector::borrow(&remaining_participants, 0) == USER2, 4);
+        assert!(*vector::borrow(&remaining_participants, 1) == USER1, 5);
+    }
+
     #[test(aptos_framework = @aptos_framework, admin = @airdrop_lottery_addr, user1 = @0x1234)]
-    public fun test_get_winners_before_draw(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, ModuleData {
+    public fun test_get_winners_before_draw(aptos_framework: &signer, admin: &signer, user1: &signer) acquires AccountLotteries, AirdropLottery, LotteryIndex, ModuleData {
         setup_test(aptos_framework, admin);
         account::create_account_for_test(signer::address_of(user1));
         let name = string::utf8(b"Test Lottery");
@@ -0,0 +1,147 @@
+/// Fenwick (binary indexed) tree of u64 values
+///
+/// Node `k` (1-based) holds the sum of the values in positions (k - lowbit(k), k], so prefix sums,
+/// updates and searching for the position that contains a cumulative offset all take O(log n).
+/// Values are appended at the back in O(log n) and removed from the back in O(1).
+module airdrop_lottery_addr::fenwick_tree {
+    use std::error;
+    use aptos_std::smart_vector::{Self, SmartVector};
+
+    friend airdrop_lottery_addr::airdrop_lottery;
+
+    /// Error codes
+    const E_OUT_OF_RANGE: u64 = 1;
+
+    struct FenwickTree has store {
+        /// Node `k` is stored at index k - 1
+        nodes: SmartVector<u64>,
+    }
+
+    /// Create an empty tree
+    public(friend) fun new(): FenwickTree {
+        FenwickTree { nodes: smart_vector::new<u64>() }
+    }
+
+    /// Destroy a tree
+    public(friend) fun destroy(tree: FenwickTree) {
+        let FenwickTree { nodes } = tree;
+        smart_vector::destroy(nodes);
+    }
+
+    /// Get the number of values in the tree
+    public(friend) fun length(tree: &FenwickTree): u64 {
+        smart_vector::length(&tree.nodes)
+    }
+
+    /// Get the sum of all values
+    public(friend) fun total(tree: &FenwickTree): u64 {
+        prefix_sum(tree, length(tree))
+    }
+
+    /// Get the sum of the first `count` values
+    public(friend) fun prefix_sum(tree: &FenwickTree, count: u64): u64 {
+        assert!(count <= length(tree), error::invalid_argument(E_OUT_OF_RANGE));
+        let sum = 0;
+        let k = count;
+        while (k > 0) {
+            sum = sum + *smart_vector::borrow(&tree.nodes, k - 1);
+            k = k - lowbit(k);
+        };
+        sum
+    }
+
+    /// Append a value
+    public(friend) fun push_back(tree: &mut FenwickTree, value: u64) {
+        // The new node covers (k - lowbit(k), k], whose values except the new one are already in the tree
+        let k = length(tree) + 1;
+        let node = value + prefix_sum(tree, k - 1) - prefix_sum(tree, k - lowbit(k));
+        smart_vector::push_back(&mut tree.nodes, node);
+    }
+
+    /// Remove the last value
+    public(friend) fun pop_back(tree: &mut FenwickTree) {
+        // No other node covers the last position
+        smart_vector::pop_back(&mut tree.nodes);
+    }
+
+    /// Add `delta` to the value at `index`
+    public(friend) fun increase(tree: &mut FenwickTree, index: u64, delta: u64) {
+        let n = length(tree);
+        assert!(index < n, error::invalid_argument(E_OUT_OF_RANGE));
+        let k = index + 1;
+        while (k <= n) {
+            let node = smart_vector::borrow_mut(&mut tree.nodes, k - 1);
+            *node = *node + delta;
+            k = k + lowbit(k);
+        };
+    }
+
+    /// Subtract `delta` from the value at `index`
+    public(friend) fun decrease(tree: &mut FenwickTree, index: u64, delta: u64) {
+        let n = length(tree);
+        assert!(index < n, error::invalid_argument(E_OUT_OF_RANGE));
+        let k = index + 1;
+        while (k <= n) {
+            let node = smart_vector::borrow_mut(&mut tree.nodes, k - 1);
+            *node = *node - delta;
+            k = k + lowbit(k);
+        };
+    }
+
+    /// Find the index of the value whose cumulative range [prefix_sum(index), prefix_sum(index + 1))
+    /// contains `offset`, which must be below `total`
+    public(friend) fun find(tree: &FenwickTree, offset: u64): u64 {
+        let n = length(tree);
+        let step = 1;
+        while (step * 2 <= n) {
+            step = step * 2;
+        };
+
+        // Descend from the largest power of two, keeping the prefix sum of the first `position` values <= offset
+        let position = 0;
+        let remaining = offset;
+        while (step > 0) {
+            let next = position + step;
+            if (next <= n) {
+                let node = *smart_vector::borrow(&tree.nodes, next - 1);
+                if (node <= remaining) {
+                    position = next;
+                    remaining = remaining - node;
+                };
+            };
+            step = step / 2;
+        };
+        assert!(position < n, error::invalid_argument(E_OUT_OF_RANGE));
+        position
+    }
+
+    /// Get the lowest set bit of `k`
+    fun lowbit(k: u64): u64 {
+        k & (k ^ (k - 1))
+    }
+
+    #[test]
+    fun test_prefix_sums_and_find() {
+        let tree = new();
+        push_back(&mut tree, 3);
+        push_back(&mut tree, 0);
+        push_back(&mut tree, 5);
+        push_back(&mut tree, 1);
+        push_back(&mut tree, 2);
+        assert!(total(&tree) == 11, 0);
+        assert!(prefix_sum(&tree, 3) == 8, 1);
+        assert!(find(&tree, 0) == 0, 2);
+        assert!(find(&tree, 2) == 0, 3);
+        assert!(find(&tree, 3) == 2, 4);
+        assert!(find(&tree, 8) == 3, 5);
+        assert!(find(&tree, 10) == 4, 6);
+
+        decrease(&mut tree, 2, 5);
+        increase(&mut tree, 1, 4);
+        assert!(find(&tree, 3) == 1, 7);
+        assert!(find(&tree, 7) == 3, 8);
+        pop_back(&mut tree);
+        assert!(total(&tree) == 8, 9);
+        destroy(tree);
+    }
+}
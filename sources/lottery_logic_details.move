@@ -35,11 +35,8 @@ module airdrop_lottery_addr::lottery_logic_details {
         let participants_copy = *participants;
         let winners = vector::empty<address>();
         
-        // Threshold for splitting the process if there are many winners
-        let threshold = 100;
-        
-        if (count <= threshold) {
-            // Standard shuffle & select algorithm (for a small number of participants)
+        if (count <= total - count) {
+            // Standard shuffle & select algorithm (when at most half of the participants win)
             let i = 0;
             while (i < count) {
                 let rand_index = randomness::u64_range(0, vector::length(&participants_copy));
@@ -48,43 +45,20 @@ module airdrop_lottery_addr::lottery_logic_details {
                 i = i + 1;
             };
         } else {
-            // Optimized algorithm for large-scale lotteries
-            // Shuffle the entire participant list
-            let shuffled = shuffle_all(&participants_copy);
-            
-            // Select the first 'count' elements as winners
-            let i = 0;
-            while (i < count) {
-                if (i < vector::length(&shuffled)) {
-                    vector::push_back(&mut winners, *vector::borrow(&shuffled, i));
-                };
+            // Complement sampling (when most participants win)
+            // Remove the total - count losers at random; everyone left is a winner
+            let i = count;
+            while (i < total) {
+                let rand_index = randomness::u64_range(0, vector::length(&participants_copy));
+                vector::remove(&mut participants_copy, rand_index);
                 i = i + 1;
             };
+            winners = participants_copy;
         };
         
         winners
     }
 
-    // Complete list shuffle (Fisher-Yates algorithm)
-    fun shuffle_all(list: &vector<address>): vector<address> {
-        let length = vector::length(list);
-        let result = *list;
-        
-        let i = length;
-        while (i > 1) {
-            i = i - 1;
-            let j = randomness::u64_range(0, i + 1);
-            if (j != i) {
-                // Swap elements
-                let temp = *vector::borrow(&result, i);
-                *vector::borrow_mut(&mut result, i) = *vector::borrow(&result, j);
-                *vector::borrow_mut(&mut result, j) = temp;
-            };
-        };
-        
-        result
-    }
-
     // Lottery fairness verification function
     // This function is for statistically verifying the fairness of the lottery results
     // It is not included in the actual contract, but is used during testing
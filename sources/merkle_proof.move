@@ -0,0 +1,157 @@
+/// Merkle commitments over participant addresses
+///
+/// - a leaf is `sha3_256(0x00 || bcs(address))`
+/// - an inner node is `sha3_256(0x01 || left || right)`
+/// - a level with an odd number of nodes pairs its last node with itself
+/// A proof lists the sibling at each level from the leaves up, so it holds ceil(log2(leaf_count)) hashes.
+module airdrop_lottery_addr::merkle_proof {
+    use std::bcs;
+    use std::hash;
+    use std::vector;
+
+    friend airdrop_lottery_addr::airdrop_lottery;
+
+    const LEAF_PREFIX: u8 = 0;
+    const NODE_PREFIX: u8 = 1;
+
+    /// Compute the leaf hash of a participant address
+    public(friend) fun leaf_hash(participant: address): vector<u8> {
+        let input = vector::singleton(LEAF_PREFIX);
+        vector::append(&mut input, bcs::to_bytes(&participant));
+        hash::sha3_256(input)
+    }
+
+    /// Check that `leaf` is the leaf at `leaf_index` of the tree with `leaf_count` leaves and root `root`
+    public(friend) fun verify(
+        root: &vector<u8>,
+        leaf_count: u64,
+        leaf_index: u64,
+        leaf: vector<u8>,
+        proof: &vector<vector<u8>>
+    ): bool {
+        if (leaf_index >= leaf_count) {
+            return false
+        };
+        
+        let node = leaf;
+        let index = leaf_index;
+        let width = leaf_count;
+        let level = 0;
+        let depth = vector::length(proof);
+        while (width > 1) {
+            if (level == depth) {
+                return false
+            };
+            let sibling = vector::borrow(proof, level);
+            node = if (index % 2 == 0) { node_hash(&node, sibling) } else { node_hash(sibling, &node) };
+            index = index / 2;
+            width = (width + 1) / 2;
+            level = level + 1;
+        };
+        
+        level == depth && &node == root
+    }
+
+    /// Add the next leaf to a tree built incrementally
+    /// `frontier` holds, per level, the root of the complete subtree still waiting for its right
+    /// sibling (empty if none), so a tree over any number of leaves needs O(log n) state.
+    public(friend) fun append_leaf(frontier: &mut vector<vector<u8>>, leaf: vector<u8>) {
+        let node = leaf;
+        let level = 0;
+        while (level < vector::length(frontier)) {
+            let pending = vector::borrow_mut(frontier, level);
+            if (vector::is_empty(pending)) {
+                *pending = node;
+                return
+            };
+            node = node_hash(pending, &node);
+            *pending = vector::empty<u8>();
+            level = level + 1;
+        };
+        vector::push_back(frontier, node);
+    }
+
+    /// Compute the root of a tree built with `append_leaf` from `leaf_count` leaves (empty if there are none)
+    /// The last node of each level that has no sibling is paired with itself, as in `verify`.
+    public(friend) fun frontier_root(frontier: &vector<vector<u8>>, leaf_count: u64): vector<u8> {
+        let depth = 0;
+        while ((1u64 << depth) < leaf_count) {
+            depth = depth + 1;
+        };
+
+        let node = vector::empty<u8>();
+        let level = 0;
+        while (level < depth) {
+            let pending = vector::borrow(frontier, (level as u64));
+            if (!vector::is_empty(pending)) {
+                node = if (vector::is_empty(&node)) { node_hash(pending, pending) } else { node_hash(pending, &node) };
+            } else if (!vector::is_empty(&node)) {
+                node = node_hash(&node, &node);
+            };
+            level = level + 1;
+        };
+        if (vector::is_empty(&node) && (depth as u64) < vector::length(frontier)) {
+            node = *vector::borrow(frontier, (depth as u64));
+        };
+        node
+    }
+
+    /// Hash two child nodes into their parent
+    fun node_hash(left: &vector<u8>, right: &vector<u8>): vector<u8> {
+        let input = vector::singleton(NODE_PREFIX);
+        vector::append(&mut input, *left);
+        vector::append(&mut input, *right);
+        hash::sha3_256(input)
+    }
+
+    #[test_only]
+    /// Build the root of a three-leaf tree and the leaves' proofs
+    public fun three_leaf_tree(first: address, second: address, third: address): (vector<u8>, vector<vector<vector<u8>>>) {
+        let leaf0 = leaf_hash(first);
+        let leaf1 = leaf_hash(second);
+        let leaf2 = leaf_hash(third);
+        let node01 = node_hash(&leaf0, &leaf1);
+        let node22 = node_hash(&leaf2, &leaf2);
+        let root = node_hash(&node01, &node22);
+        (root, vector[vector[leaf1, node22], vector[leaf0, node22], vector[leaf2, node01]])
+    }
+
+    #[test]
+    fun test_verify() {
+        let (root, proofs) = three_leaf_tree(@0x1, @0x2, @0x3);
+        assert!(verify(&root, 3, 0, leaf_hash(@0x1), vector::borrow(&proofs, 0)), 0);
+        assert!(verify(&root, 3, 1, leaf_hash(@0x2), vector::borrow(&proofs, 1)), 1);
+        assert!(verify(&root, 3, 2, leaf_hash(@0x3), vector::borrow(&proofs, 2)), 2);
+        
+        // Wrong leaf, wrong index and out-of-range index are rejected
+        assert!(!verify(&root, 3, 0, leaf_hash(@0x2), vector::borrow(&proofs, 0)), 3);
+        assert!(!verify(&root, 3, 1, leaf_hash(@0x1), vector::borrow(&proofs, 0)), 4);
+        assert!(!verify(&root, 3, 3, leaf_hash(@0x3), vector::borrow(&proofs, 2)), 5);
+    }
+
+    #[test]
+    fun test_frontier_root() {
+        let frontier = vector::empty<vector<u8>>();
+        assert!(vector::is_empty(&frontier_root(&frontier, 0)), 0);
+        append_leaf(&mut frontier, leaf_hash(@0x1));
+        assert!(frontier_root(&frontier, 1) == leaf_hash(@0x1), 1);
+        append_leaf(&mut frontier, leaf_hash(@0x2));
+        append_leaf(&mut frontier, leaf_hash(@0x3));
+        let (root, _) = three_leaf_tree(@0x1, @0x2, @0x3);
+        assert!(frontier_root(&frontier, 3) == root, 2);
+        
+        // Five leaves: the last leaf is paired with itself on two levels
+        append_leaf(&mut frontier, leaf_hash(@0x4));
+        append_leaf(&mut frontier, leaf_hash(@0x5));
+        let leaf4 = leaf_hash(@0x5);
+        let node44 = node_hash(&leaf4, &leaf4);
+        let right = node_hash(&node44, &node44);
+        let left = node_hash(
+            &node_hash(&leaf_hash(@0x1), &leaf_hash(@0x2)),
+            &node_hash(&leaf_hash(@0x3), &leaf_hash(@0x4))
+        );
+        let root = frontier_root(&frontier, 5);
+        assert!(root == node_hash(&left, &right), 3);
+        assert!(verify(&root, 5, 4, leaf4, &vector[leaf4, node44, left]), 4);
+    }
+}
@@ -0,0 +1,57 @@
+/// Deterministic index stream derived from a single random seed
+///
+/// Draws take one 32-byte seed from Aptos randomness and derive every index from it, so anyone
+/// can recompute the winners off-chain from the seed stored on the lottery:
+/// - block `c` is `sha3_256(seed || bcs(c))`, where `c` is a u64 counter starting at 0
+/// - the block is read as a little-endian u256 `v`
+/// - for a range of size `n`, `v` is accepted if `v < floor(MAX_U256 / n) * n` and the index is
+///   `low + v % n`; otherwise the block is rejected and the next counter is tried
+/// Rejection removes modulo bias and happens with probability below n / 2^256.
+module airdrop_lottery_addr::random_stream {
+    use std::bcs;
+    use std::error;
+    use std::hash;
+    use std::vector;
+    use aptos_std::from_bcs;
+
+    friend airdrop_lottery_addr::airdrop_lottery;
+
+    /// Error codes
+    const E_EMPTY_RANGE: u64 = 1;
+
+    const MAX_U256: u256 = 115792089237316195423570985008687907853269984665640564039457584007913129639935;
+
+    /// Derive a uniformly distributed index in [low, high) from the seed, starting at block `counter`
+    /// Returns the index and the counter of the next unused block
+    public(friend) fun index_in_range(seed: &vector<u8>, counter: u64, low: u64, high: u64): (u64, u64) {
+        assert!(low < high, error::invalid_argument(E_EMPTY_RANGE));
+        let range = ((high - low) as u256);
+        let limit = (MAX_U256 / range) * range;
+        loop {
+            let value = block(seed, counter);
+            counter = counter + 1;
+            if (value < limit) {
+                return (low + ((value % range) as u64), counter)
+            };
+        }
+    }
+
+    /// Compute block `counter` of the stream as a u256
+    public(friend) fun block(seed: &vector<u8>, counter: u64): u256 {
+        let input = *seed;
+        vector::append(&mut input, bcs::to_bytes(&counter));
+        from_bcs::to_u256(hash::sha3_256(input))
+    }
+
+    #[test]
+    fun test_index_in_range_is_deterministic() {
+        let seed = b"airdrop lottery test seed";
+        let (first, next) = index_in_range(&seed, 0, 10, 20);
+        assert!(first >= 10 && first < 20, 0);
+        assert!(next == 1, 1);
+        let (again, _) = index_in_range(&seed, 0, 10, 20);
+        assert!(again == first, 2);
+        let (single, _) = index_in_range(&seed, 7, 5, 6);
+        assert!(single == 5, 3);
+    }
+}
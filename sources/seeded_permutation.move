@@ -0,0 +1,116 @@
+/// Keyed pseudorandom permutation of [0, n) derived from a random seed
+///
+/// Lazily drawn lotteries store only their seed and evaluate winner `i` as the participant at
+/// position `apply(seed, n, i)`, so anyone can recompute the winners off-chain:
+/// - the domain [0, 2^(2h)) is the smallest one with an even bit count 2h >= 2 covering n
+/// - a value is split into halves `l` (high h bits) and `r` (low h bits) and goes through
+///   ROUNDS Feistel rounds `(l, r) -> (r, l xor f(round, r))`
+/// - `f(round, r)` is the low h bits of `sha3_256(seed || bcs(round) || bcs(r))` read as a little-endian u256
+/// - results outside [0, n) are fed through the network again (cycle walking) until one falls inside
+/// The domain is less than 4n, so a value needs fewer than four walks on average.
+module airdrop_lottery_addr::seeded_permutation {
+    use std::bcs;
+    use std::error;
+    use std::hash;
+    use std::vector;
+    use aptos_std::from_bcs;
+
+    friend airdrop_lottery_addr::airdrop_lottery;
+
+    /// Error codes
+    const E_OUT_OF_DOMAIN: u64 = 1;
+
+    const ROUNDS: u8 = 4;
+
+    /// Map `index` in [0, n) to its position under the permutation keyed by `seed`
+    public(friend) fun apply(seed: &vector<u8>, n: u64, index: u64): u64 {
+        assert!(index < n, error::invalid_argument(E_OUT_OF_DOMAIN));
+        let half_bits = half_bits(n);
+        let value = feistel(seed, half_bits, index);
+        while (value >= n) {
+            value = feistel(seed, half_bits, value);
+        };
+        value
+    }
+
+    /// Map a position in [0, n) back to the index that `apply` sends there
+    public(friend) fun invert(seed: &vector<u8>, n: u64, position: u64): u64 {
+        assert!(position < n, error::invalid_argument(E_OUT_OF_DOMAIN));
+        let half_bits = half_bits(n);
+        let value = feistel_inverse(seed, half_bits, position);
+        while (value >= n) {
+            value = feistel_inverse(seed, half_bits, value);
+        };
+        value
+    }
+
+    /// Get the smallest half width h >= 1 such that 2^(2h) >= n
+    fun half_bits(n: u64): u8 {
+        let half_bits = 1;
+        while (half_bits < 32 && (1u64 << (2 * half_bits)) < n) {
+            half_bits = half_bits + 1;
+        };
+        half_bits
+    }
+
+    /// Run the Feistel network forward over [0, 2^(2 * half_bits))
+    fun feistel(seed: &vector<u8>, half_bits: u8, value: u64): u64 {
+        let mask = (1u64 << half_bits) - 1;
+        let left = value >> half_bits;
+        let right = value & mask;
+        let round = 0;
+        while (round < ROUNDS) {
+            let next_right = left ^ round_value(seed, round, right, mask);
+            left = right;
+            right = next_right;
+            round = round + 1;
+        };
+        (left << half_bits) | right
+    }
+
+    /// Run the Feistel network backward over [0, 2^(2 * half_bits))
+    fun feistel_inverse(seed: &vector<u8>, half_bits: u8, value: u64): u64 {
+        let mask = (1u64 << half_bits) - 1;
+        let left = value >> half_bits;
+        let right = value & mask;
+        let round = ROUNDS;
+        while (round > 0) {
+            round = round - 1;
+            let previous_left = right ^ round_value(seed, round, left, mask);
+            right = left;
+            left = previous_left;
+        };
+        (left << half_bits) | right
+    }
+
+    /// Compute the round function of the network
+    fun round_value(seed: &vector<u8>, round: u8, half: u64, mask: u64): u64 {
+        let input = *seed;
+        vector::append(&mut input, bcs::to_bytes(&round));
+        vector::append(&mut input, bcs::to_bytes(&half));
+        ((from_bcs::to_u256(hash::sha3_256(input)) & (mask as u256)) as u64)
+    }
+
+    #[test]
+    fun test_apply_is_a_permutation() {
+        let seed = b"airdrop lottery test seed";
+        let n = 37;
+        let seen = vector::empty<bool>();
+        let i = 0;
+        while (i < n) {
+            vector::push_back(&mut seen, false);
+            i = i + 1;
+        };
+
+        let i = 0;
+        while (i < n) {
+            let position = apply(&seed, n, i);
+            assert!(position < n, 0);
+            assert!(!*vector::borrow(&seen, position), 1);
+            *vector::borrow_mut(&mut seen, position) = true;
+            assert!(invert(&seed, n, position) == i, 2);
+            i = i + 1;
+        };
+        assert!(apply(&seed, 1, 0) == 0, 3);
+    }
+}